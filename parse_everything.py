@@ -14,58 +14,35 @@ Based on SWGEmu Core3 architecture
 """
 
 import os
+import re
 import sys
 import json
+import time
+import queue
+import argparse
+import threading
 import struct
-import gzip
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Any, BinaryIO
 from datetime import datetime
 from collections import defaultdict
 
-class IFFParser:
-    """Parse IFF (Interchange File Format) files"""
-    
-    def __init__(self, data: bytes):
-        self.data = data
-        self.offset = 0
-        
-    def read_chunk(self):
-        """Read an IFF chunk"""
-        if self.offset + 8 > len(self.data):
-            return None
-            
-        chunk_type = self.data[self.offset:self.offset+4].decode('ascii', errors='ignore')
-        chunk_size = struct.unpack('>I', self.data[self.offset+4:self.offset+8])[0]
-        self.offset += 8
-        
-        chunk_data = self.data[self.offset:self.offset+chunk_size]
-        self.offset += chunk_size
-        
-        # Align to even boundary
-        if chunk_size % 2:
-            self.offset += 1
-            
-        return {
-            'type': chunk_type,
-            'size': chunk_size,
-            'data': chunk_data
-        }
-    
-    def parse_all(self):
-        """Parse all chunks"""
-        chunks = []
-        while self.offset < len(self.data):
-            chunk = self.read_chunk()
-            if not chunk:
-                break
-            chunks.append(chunk)
-        return chunks
+from swg_common import (IFFParser, ShaderParser, AssetDeduplicator, DeltaManifestBuilder,
+                        NAME_CLASSIFIER, read_cstring, normalize_asset_path)
 
+# Heavier modules (sqlite3, http.server, concurrent.futures, zlib, ...) are
+# imported inside the stage that needs them so single-stage runs start fast.
 
 class TREExtractor:
     """Extract files from .tre archives (SWG resource archives)"""
     
+    HEADER = struct.Struct('<4sII')    # "EERT", version, file count
+    NAME_LENGTH = struct.Struct('<I')
+    RECORD = struct.Struct('<IIII')    # compressed size, uncompressed size, offset, compression
+    TABLE_BLOCK = 256 * 1024           # file table is read in blocks of this size, never the payload
+    
     def __init__(self, tre_path: str):
         self.tre_path = tre_path
         self.files = {}
@@ -73,41 +50,77 @@ class TREExtractor:
     def extract(self):
         """Extract TRE archive"""
         try:
-            with open(self.tre_path, 'rb') as f:
-                # TRE header: "EERT" + version
-                magic = f.read(4)
-                if magic != b'EERT':
-                    print(f"   ❌ Not a valid TRE file: {self.tre_path}")
-                    return {}
-                
-                version = struct.unpack('<I', f.read(4))[0]
-                file_count = struct.unpack('<I', f.read(4))[0]
-                
-                print(f"   📦 TRE v{version}: {file_count} files")
-                
-                # Read file table
-                for i in range(file_count):
-                    # TRE file entry structure
-                    name_len = struct.unpack('<I', f.read(4))[0]
-                    name = f.read(name_len).decode('ascii', errors='ignore')
-                    
-                    compressed_size = struct.unpack('<I', f.read(4))[0]
-                    uncompressed_size = struct.unpack('<I', f.read(4))[0]
-                    offset = struct.unpack('<I', f.read(4))[0]
-                    compression = struct.unpack('<I', f.read(4))[0]
-                    
-                    self.files[name] = {
-                        'offset': offset,
-                        'compressed_size': compressed_size,
-                        'uncompressed_size': uncompressed_size,
-                        'compression': compression
-                    }
-                
-                return self.files
-                
-        except Exception as e:
+            toc = self.read_toc()
+        except (OSError, ValueError, struct.error) as e:
             print(f"   ❌ TRE extraction failed: {e}")
             return {}
+        
+        if toc is None:
+            print(f"   ❌ Not a valid TRE file: {self.tre_path}")
+            return {}
+        
+        self.files = {
+            name: {
+                'offset': offset,
+                'compressed_size': compressed_size,
+                'uncompressed_size': uncompressed_size,
+                'compression': compression
+            }
+            for name, (compressed_size, uncompressed_size, offset, compression) in toc.items()
+        }
+        return self.files
+    
+    def read_toc(self) -> Dict[str, tuple]:
+        """{name: (compressed size, uncompressed size, offset, compression)}, None if not a TRE"""
+        with open(self.tre_path, 'rb') as f:
+            data = f.read(self.HEADER.size)
+            if len(data) < self.HEADER.size:
+                return None
+            magic, version, file_count = self.HEADER.unpack(data)
+            if magic != b'EERT':
+                return None
+            
+            print(f"   📦 TRE v{version}: {file_count} files")
+            
+            # Every entry needs at least its length prefix and record
+            remaining = os.fstat(f.fileno()).st_size - self.HEADER.size
+            entry_size = self.NAME_LENGTH.size + self.RECORD.size
+            if file_count * entry_size > remaining:
+                raise ValueError(f"header claims {file_count} files, archive holds at most "
+                                 f"{remaining // entry_size}")
+            
+            # The file table sits right after the header. Read it block by block
+            # (entries are variable length, so its extent is only known at the end)
+            # and unpack each entry's four fixed fields with a single call.
+            toc = {}
+            data = b''
+            offset = 0
+            name_length = self.NAME_LENGTH.unpack_from
+            record = self.RECORD.unpack_from
+            for _ in range(file_count):
+                if offset + self.NAME_LENGTH.size > len(data):
+                    data, offset = self.refill(f, data, offset, self.NAME_LENGTH.size)
+                length = name_length(data, offset)[0]
+                if offset + self.NAME_LENGTH.size + length + self.RECORD.size > len(data):
+                    data, offset = self.refill(f, data, offset,
+                                               self.NAME_LENGTH.size + length + self.RECORD.size)
+                offset += self.NAME_LENGTH.size
+                name = data[offset:offset + length].decode('ascii', errors='ignore')
+                offset += length
+                toc[name] = record(data, offset)
+                offset += self.RECORD.size
+        
+        return toc
+    
+    def refill(self, f: BinaryIO, data: bytes, offset: int, needed: int) -> tuple:
+        """Drop consumed table bytes and read until `needed` bytes are buffered"""
+        data = data[offset:]
+        while len(data) < needed:
+            block = f.read(max(self.TABLE_BLOCK, needed - len(data)))
+            if not block:
+                raise ValueError(f"file table entry of {needed} bytes runs past the end of the archive")
+            data += block
+        return data, 0
     
     def extract_file(self, filename: str) -> bytes:
         """Extract a specific file from TRE"""
@@ -127,10 +140,1559 @@ class TREExtractor:
         return data
 
 
+class TREIndex:
+    """Priority-ordered name index over every .tre archive, with a persisted TOC cache.
+    
+    Archives are given lowest priority first; as in the client, a later archive
+    overrides any earlier one that holds the same path. Each archive's table of
+    contents is cached keyed by its size and mtime, so unchanged archives are
+    never re-read.
+    """
+    
+    def __init__(self, archives: List[Path], cache_path: str = None):
+        self.archives = [Path(a) for a in archives]
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.counts = {}     # archive -> number of entries in its TOC
+        self.index = {}      # name -> (archive number, compressed, uncompressed, offset, compression)
+        self.cache_hits = 0
+        
+    def build(self) -> 'TREIndex':
+        """Load or read every archive's TOC and merge them by priority"""
+        cache = self.load_cache()
+        fresh = {}
+        
+        for number, archive in enumerate(self.archives):
+            stat = archive.stat()
+            key = str(archive)
+            entry = cache.pop(key, None)
+            if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+                self.cache_hits += 1
+            else:
+                print(f"   Opening: {archive.name}")
+                try:
+                    toc = TREExtractor(key).read_toc()
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"   ❌ Skipping {archive.name}: {e}")
+                    continue
+                if toc is None:
+                    print(f"   ❌ Not a valid TRE file: {archive}")
+                    continue
+                entry = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'files': toc}
+            
+            # Archives come lowest priority first, so merging in order lets later ones win.
+            # Only the merged index is kept; the TOC itself lives on in the cache file.
+            for name, record in entry['files'].items():
+                self.index[self.normalize(name)] = (number, *record)
+            self.counts[archive] = len(entry['files'])
+            fresh[key] = entry
+        
+        cache = None
+        self.save_cache(fresh)
+        return self
+    
+    def load_cache(self) -> Dict[str, Any]:
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_cache(self, cache: Dict[str, Any]):
+        if not self.cache_path:
+            return
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+    
+    @staticmethod
+    def normalize(name: str) -> str:
+        return name.replace('\\', '/').lower()
+    
+    def __contains__(self, name: str) -> bool:
+        return self.normalize(name) in self.index
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def lookup(self, name: str) -> Dict[str, Any]:
+        """Which archive serves a path, and where; None if no archive has it"""
+        entry = self.index.get(self.normalize(name))
+        if entry is None:
+            return None
+        number, compressed_size, uncompressed_size, offset, compression = entry
+        return {
+            'archive': self.archives[number].name,
+            'offset': offset,
+            'compressed_size': compressed_size,
+            'uncompressed_size': uncompressed_size,
+            'compression': compression
+        }
+    
+    def read(self, name: str) -> bytes:
+        """Bytes of a path from whichever archive serves it: one probe, one read"""
+        entry = self.index.get(self.normalize(name))
+        if entry is None:
+            return None
+        number, compressed_size, _uncompressed_size, offset, compression = entry
+        
+        with open(self.archives[number], 'rb') as f:
+            f.seek(offset)
+            data = f.read(compressed_size)
+        
+        if compression == 2:  # ZLIB
+            import zlib
+            data = zlib.decompress(data)
+        return data
+    
+    def names(self):
+        """(name, serving archive) for every indexed path"""
+        for name, entry in self.index.items():
+            yield name, self.archives[entry[0]].name
+
+
+class STFParser:
+    """Parse .stf string tables (localized display text)"""
+    
+    MAGIC = 0xABCD
+    
+    def __init__(self, data: bytes):
+        self.data = data
+        
+    def parse(self) -> Dict[str, str]:
+        """Return {string_id: text}; ValueError if the table runs past the end of the data"""
+        if len(self.data) < 13:
+            return {}
+        
+        magic, _flag, _next_id, count = struct.unpack_from('<IBII', self.data, 0)
+        if magic != self.MAGIC:
+            return {}
+        
+        offset = 13
+        values = {}
+        for _ in range(count):
+            self.require(offset, 12, count)
+            entry_id, _crc, length = struct.unpack_from('<III', self.data, offset)
+            offset += 12
+            self.require(offset, length * 2, count)
+            values[entry_id] = self.data[offset:offset + length * 2].decode('utf-16-le', errors='ignore')
+            offset += length * 2
+        
+        strings = {}
+        for _ in range(count):
+            self.require(offset, 8, count)
+            entry_id, length = struct.unpack_from('<II', self.data, offset)
+            offset += 8
+            self.require(offset, length, count)
+            key = self.data[offset:offset + length].decode('ascii', errors='ignore')
+            offset += length
+            strings[key] = values.get(entry_id, '')
+        
+        return strings
+    
+    def require(self, offset: int, size: int, count: int):
+        if offset + size > len(self.data):
+            raise ValueError(f'string table of {count} entries is truncated at byte {offset}')
+
+
+# Inputs at least this large are memory-mapped instead of read into RAM
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+@contextmanager
+def open_mapped(path: Path, threshold: int = MMAP_THRESHOLD):
+    """Yield file contents: a zero-copy memoryview over an mmap for large files, bytes otherwise.
+    
+    Slices of the view must not outlive the ``with`` block.
+    """
+    if os.path.getsize(path) < threshold:
+        with open(path, 'rb') as f:
+            yield f.read()
+        return
+    
+    import mmap
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # A propagating exception still holds slices; the map is freed with them
+                pass
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate resident size in bytes of a JSON-like structure"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v) for v in value)
+    return size
+
+
+def parse_size(text: str) -> int:
+    """'512M', '1.5G', '800000' -> bytes"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+# Top-level directories of the client tree. 'mesh' and 'skeleton' also appear
+# because appearance children are referenced relative to appearance/.
+ASSET_DIRECTORIES = (
+    'abstract', 'appearance', 'clientdata', 'clienteffect', 'cockpit', 'creation',
+    'customization', 'datatables', 'effect', 'forcefeedback', 'input', 'interiorlayout',
+    'misc', 'object', 'palette', 'pixel_program', 'sample', 'scene', 'shader',
+    'shared_program', 'snapshot', 'sound', 'string', 'terrain', 'texture', 'vertex_program',
+    'mesh', 'skeleton'
+)
+
+# Asset paths are stored in IFF data as NUL-terminated strings, usually right after
+# a length byte or tag, so a match has to start at a known directory
+ASSET_REFERENCE_PATTERN = re.compile(
+    rb'((?:' + b'|'.join(sorted((d.encode() for d in ASSET_DIRECTORIES), key=len, reverse=True)) +
+    rb')[/\\][A-Za-z0-9_./\\\-]*?\.'
+    rb'(?:iff|apt|sat|lod|lmg|msh|mgn|pob|sht|eft|psh|vsh|dds|tga|pal|cdf|cef|prt|ws|trn|skt|ans))\x00'
+)
+
+
+class SnapshotReader:
+    """Decode a .ws world snapshot: its object template table and every placement node"""
+    
+    # objectId, parentId, templateIndex, cellIndex, rotation (w, x, y, z), position (x, y, z),
+    # radius, portal layout crc
+    NODE = struct.Struct('<IIIi4f3ffI')
+    FIELDS = ('object_id', 'parent_id', 'template', 'cell', 'qw', 'qx', 'qy', 'qz',
+              'x', 'y', 'z', 'radius', 'portal_crc', 'depth')
+    
+    def __init__(self, data: bytes):
+        self.data = data
+        
+    def read(self) -> Dict[str, Any]:
+        """{'templates': [path], 'nodes': [tuple in FIELDS order]}
+        
+        Root nodes (depth 0) are in world space; nested nodes are relative to their parent.
+        """
+        templates, nodes = [], []
+        for path, chunk_type, data in IFFParser(self.data).walk():
+            if chunk_type == 'DATA' and len(data) == self.NODE.size and path[-2:] == ('NODE', '0000'):
+                # NODS/NODE/0000 nests one NODE/0000 pair per level
+                nodes.append(self.NODE.unpack(data) + ((len(path) - 5) // 2,))
+            elif chunk_type == 'OTNL' and len(data) >= 4:
+                count = struct.unpack_from('<I', data)[0]
+                names = bytes(data[4:]).split(b'\x00')[:count]
+                templates = [name.decode('ascii', errors='ignore') for name in names]
+        
+        return {'templates': templates, 'nodes': nodes}
+
+
+class MaterialTableBuilder:
+    """Intern textures, effects and pixel programs into a compact material table"""
+    
+    def __init__(self):
+        self.tables = {'textures': [], 'effects': [], 'pixel_programs': []}
+        self.ids = {'textures': {}, 'effects': {}, 'pixel_programs': {}}
+        self.effect_info = {}
+        self.program_info = {}
+        self.materials = []
+        
+    def intern(self, table: str, name: str) -> int:
+        """Return the integer ID for a name, assigning the next one on first use"""
+        ids = self.ids[table]
+        if name not in ids:
+            ids[name] = len(self.tables[table])
+            self.tables[table].append(name)
+        return ids[name]
+    
+    def add_effect(self, path: str, effect: Dict[str, Any]) -> int:
+        effect_id = self.intern('effects', path)
+        self.effect_info[effect_id] = {
+            'passes': effect['passes'],
+            'texture_tags': effect['texture_tags'],
+            'pixel_programs': [self.intern('pixel_programs', p) for p in effect['pixel_programs']]
+        }
+        return effect_id
+    
+    def add_pixel_program(self, path: str, program: Dict[str, Any]) -> int:
+        program_id = self.intern('pixel_programs', path)
+        self.program_info[program_id] = program
+        return program_id
+    
+    def add_shader(self, path: str, shader: Dict[str, Any]):
+        self.materials.append({
+            'shader': path,
+            'effect': self.intern('effects', shader['effect']) if shader['effect'] else None,
+            'textures': {tag: self.intern('textures', tex) for tag, tex in shader['textures'].items()},
+            'material': shader['materials'].get('MAIN') or next(iter(shader['materials'].values()), None),
+            'texture_factors': shader['texture_factors'],
+            'customizable': shader['customizable']
+        })
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact output: names stored once, everything else refers to them by index"""
+        return {
+            'textures': self.tables['textures'],
+            'effects': [
+                dict(name=name, **self.effect_info.get(i, {}))
+                for i, name in enumerate(self.tables['effects'])
+            ],
+            'pixel_programs': [
+                dict(name=name, **self.program_info.get(i, {}))
+                for i, name in enumerate(self.tables['pixel_programs'])
+            ],
+            # Shaders sharing an effect and texture set can be drawn in one batch
+            'materials': sorted(self.materials, key=lambda m: (
+                m['effect'] if m['effect'] is not None else -1, sorted(m['textures'].values())))
+        }
+
+
+class SQLiteCatalogExporter:
+    """Write parse results into a normalized, indexed SQLite catalog"""
+    
+    SCHEMA = """
+        CREATE TABLE objects (
+            id INTEGER PRIMARY KEY, category TEXT, name TEXT, file TEXT,
+            path TEXT UNIQUE, tier INTEGER, display_name TEXT
+        );
+        CREATE TABLE textures (id INTEGER PRIMARY KEY, name TEXT, archive TEXT);
+        CREATE TABLE meshes (id INTEGER PRIMARY KEY, name TEXT, archive TEXT);
+        CREATE TABLE effects (
+            id INTEGER PRIMARY KEY, name TEXT, file TEXT, size INTEGER,
+            has_alpha INTEGER, type TEXT
+        );
+        CREATE TABLE datatables (id INTEGER PRIMARY KEY, category TEXT, name TEXT, file TEXT);
+        CREATE TABLE snapshots (
+            id INTEGER PRIMARY KEY, scene TEXT UNIQUE, file TEXT,
+            objects INTEGER, chunks INTEGER
+        );
+        CREATE TABLE planets (id INTEGER PRIMARY KEY, name TEXT UNIQUE, has_terrain INTEGER);
+        CREATE TABLE planet_snapshots (planet_id INTEGER REFERENCES planets(id), scene TEXT);
+        CREATE TABLE planet_cities (
+            planet_id INTEGER REFERENCES planets(id), name TEXT, x REAL, y REAL, z REAL
+        );
+        CREATE TABLE planet_spawns (
+            planet_id INTEGER REFERENCES planets(id), type TEXT, city TEXT, x REAL, y REAL, z REAL
+        );
+        CREATE TABLE strings (id INTEGER PRIMARY KEY, language TEXT, file TEXT, key TEXT, text TEXT);
+        CREATE TABLE dependencies (source TEXT, target TEXT, PRIMARY KEY (source, target)) WITHOUT ROWID;
+        CREATE VIRTUAL TABLE search USING fts5(kind UNINDEXED, name, text);
+    """
+    
+    INDEXES = """
+        CREATE INDEX idx_objects_category_tier ON objects(category, tier);
+        CREATE INDEX idx_objects_name ON objects(name);
+        CREATE INDEX idx_textures_name ON textures(name);
+        CREATE INDEX idx_meshes_name ON meshes(name);
+        CREATE INDEX idx_effects_type ON effects(type);
+        CREATE INDEX idx_effects_name ON effects(name);
+        CREATE INDEX idx_datatables_category ON datatables(category);
+        CREATE INDEX idx_planet_snapshots_planet ON planet_snapshots(planet_id);
+        CREATE INDEX idx_planet_cities_planet ON planet_cities(planet_id);
+        CREATE INDEX idx_planet_spawns_planet ON planet_spawns(planet_id);
+        CREATE UNIQUE INDEX idx_strings_key ON strings(language, file, key);
+        CREATE INDEX idx_dependencies_target ON dependencies(target);
+    """
+    
+    REFERENCE_PATTERN = ASSET_REFERENCE_PATTERN
+    OBJECT_NAME_PATTERN = re.compile(rb'objectName\x00\x01\x01([^\x00]+)\x00\x01([^\x00]+)\x00')
+    TIER_PATTERN = re.compile(r'tier(\d+)', re.IGNORECASE)
+    
+    def __init__(self, swg_path: Path, results: Dict[str, Any]):
+        self.swg_path = swg_path
+        self.results = results
+        
+    def export(self, db_path: str) -> Dict[str, int]:
+        """Build the catalog in a single transaction and return row counts"""
+        import sqlite3
+        
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.executescript(self.SCHEMA)
+            with conn:
+                self.insert_objects(conn)
+                self.insert_assets(conn)
+                self.insert_planets(conn)
+                self.insert_strings(conn)
+                self.insert_dependencies(conn)
+                conn.executescript(self.INDEXES)
+            conn.execute("INSERT INTO search(search) VALUES ('optimize')")
+            conn.commit()
+            
+            return {
+                table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('objects', 'textures', 'meshes', 'effects', 'datatables',
+                              'snapshots', 'planets', 'strings', 'dependencies')
+            }
+        finally:
+            conn.close()
+    
+    def insert_objects(self, conn: 'sqlite3.Connection'):
+        """Objects, with tier and string-table display name resolved from the template"""
+        strings = self.load_strings('en')
+        rows = []
+        for category, entries in self.results['objects'].items():
+            for entry in entries:
+                tier_match = self.TIER_PATTERN.search(entry['name'])
+                display_name = None
+                
+                data = self.read_asset(entry['path'])
+                match = self.OBJECT_NAME_PATTERN.search(data) if data else None
+                if match:
+                    table = match.group(1).decode('ascii', errors='ignore')
+                    key = match.group(2).decode('ascii', errors='ignore')
+                    display_name = strings.get((table, key))
+                
+                rows.append((category, entry['name'], entry['file'], self.normalize(entry['path']),
+                             int(tier_match.group(1)) if tier_match else None, display_name))
+        
+        conn.executemany(
+            'INSERT OR IGNORE INTO objects (category, name, file, path, tier, display_name) '
+            'VALUES (?, ?, ?, ?, ?, ?)', rows)
+        conn.executemany(
+            "INSERT INTO search (kind, name, text) VALUES ('object', ?, ?)",
+            ((row[1], row[5] or '') for row in rows))
+    
+    def insert_assets(self, conn: 'sqlite3.Connection'):
+        """Textures, meshes, effects, datatables and snapshots"""
+        textures = [(t['name'], t['archive']) for t in self.results['textures']]
+        meshes = [(m['name'], m['archive']) for m in self.results['meshes']]
+        effects = [(e['name'], e['file'], e['size'], int(e['has_alpha']), e['type'])
+                   for e in self.results['effects']]
+        datatables = [(category, dt['name'], dt['file'])
+                      for category, entries in self.results['datatables'].items()
+                      for dt in entries]
+        snapshots = [(scene, snap['file'], snap['objects'], snap['chunks'])
+                     for scene, snap in self.results['snapshots'].items()]
+        
+        conn.executemany('INSERT INTO textures (name, archive) VALUES (?, ?)', textures)
+        conn.executemany('INSERT INTO meshes (name, archive) VALUES (?, ?)', meshes)
+        conn.executemany(
+            'INSERT INTO effects (name, file, size, has_alpha, type) VALUES (?, ?, ?, ?, ?)', effects)
+        conn.executemany('INSERT INTO datatables (category, name, file) VALUES (?, ?, ?)', datatables)
+        conn.executemany(
+            'INSERT INTO snapshots (scene, file, objects, chunks) VALUES (?, ?, ?, ?)', snapshots)
+        
+        search_rows = [('texture', name, '') for name, _ in textures]
+        search_rows += [('mesh', name, '') for name, _ in meshes]
+        search_rows += [('effect', e[0], e[4]) for e in effects]
+        search_rows += [('datatable', dt[1], dt[0]) for dt in datatables]
+        search_rows += [('snapshot', snap[0], '') for snap in snapshots]
+        conn.executemany('INSERT INTO search (kind, name, text) VALUES (?, ?, ?)', search_rows)
+    
+    def insert_planets(self, conn: 'sqlite3.Connection'):
+        """Planets with their snapshots, cities and spawn points"""
+        snapshots, cities, spawns = [], [], []
+        for name, planet in self.results['planets'].items():
+            planet_id = conn.execute(
+                'INSERT INTO planets (name, has_terrain) VALUES (?, ?)',
+                (name, int(planet['terrain']))).lastrowid
+            snapshots += [(planet_id, scene) for scene in planet['snapshots']]
+            cities += [(planet_id, c['name'], c['x'], c['y'], c['z']) for c in planet['cities']]
+            spawns += [(planet_id, s['type'], s['city'], s['x'], s['y'], s['z'])
+                       for s in planet['spawn_points']]
+        
+        conn.executemany('INSERT INTO planet_snapshots (planet_id, scene) VALUES (?, ?)', snapshots)
+        conn.executemany(
+            'INSERT INTO planet_cities (planet_id, name, x, y, z) VALUES (?, ?, ?, ?, ?)', cities)
+        conn.executemany(
+            'INSERT INTO planet_spawns (planet_id, type, city, x, y, z) VALUES (?, ?, ?, ?, ?, ?)', spawns)
+        conn.executemany(
+            "INSERT INTO search (kind, name, text) VALUES ('city', ?, ?)",
+            ((city['name'], name) for name, planet in self.results['planets'].items()
+             for city in planet['cities']))
+    
+    def insert_strings(self, conn: 'sqlite3.Connection'):
+        """All string-table entries, searchable by their display text"""
+        string_path = self.swg_path / 'string'
+        if not string_path.exists():
+            return
+        
+        rows = []
+        for stf_file in string_path.rglob('*.stf'):
+            relative = stf_file.relative_to(string_path)
+            language = relative.parts[0]
+            table = '/'.join(relative.with_suffix('').parts[1:])
+            try:
+                entries = STFParser(stf_file.read_bytes()).parse()
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to parse {stf_file.name}: {e}")
+                continue
+            rows += [(language, table, key, text) for key, text in entries.items()]
+        
+        conn.executemany('INSERT OR IGNORE INTO strings (language, file, key, text) VALUES (?, ?, ?, ?)', rows)
+        conn.executemany(
+            "INSERT INTO search (kind, name, text) VALUES ('string', ?, ?)",
+            ((f'{table}:{key}', text) for language, table, key, text in rows if language == 'en'))
+    
+    def insert_dependencies(self, conn: 'sqlite3.Connection'):
+        """Reference edges from objects, effects, shaders and snapshots to the assets they name"""
+        sources = [entry['path'] for entries in self.results['objects'].values() for entry in entries]
+        sources += [f"effect/{e['file']}" for e in self.results['effects']]
+        sources += [f"snapshot/{snap['file']}" for snap in self.results['snapshots'].values()]
+        
+        shader_path = self.swg_path / 'shader'
+        if shader_path.exists():
+            sources += [str(sht.relative_to(self.swg_path)) for sht in shader_path.rglob('*.sht')]
+        
+        edges = set()
+        for source in sources:
+            data = self.read_asset(source)
+            if not data:
+                continue
+            source = self.normalize(source)
+            for match in self.REFERENCE_PATTERN.finditer(data):
+                target = self.normalize(match.group(1).decode('ascii', errors='ignore'))
+                if target != source:
+                    edges.add((source, target))
+        
+        conn.executemany('INSERT INTO dependencies (source, target) VALUES (?, ?)', edges)
+    
+    def load_strings(self, language: str) -> Dict[tuple, str]:
+        """{(table, key): text} for one language"""
+        lang_path = self.swg_path / 'string' / language
+        strings = {}
+        if not lang_path.exists():
+            return strings
+        
+        for stf_file in lang_path.rglob('*.stf'):
+            table = stf_file.relative_to(lang_path).with_suffix('').as_posix()
+            try:
+                entries = STFParser(stf_file.read_bytes()).parse()
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to parse {stf_file.name}: {e}")
+                continue
+            for key, text in entries.items():
+                strings[(table, key)] = text
+        return strings
+    
+    def read_asset(self, relative_path: str) -> bytes:
+        """Read a loose asset file relative to the source tree"""
+        try:
+            return (self.swg_path / relative_path).read_bytes()
+        except OSError:
+            return b''
+    
+    @staticmethod
+    def normalize(path: str) -> str:
+        return normalize_asset_path(path)
+
+
+class WorldTileExporter:
+    """Cut each planet into fixed-size tiles, one self-contained binary package per tile.
+    
+    Packages for a planet are concatenated into ``<planet>.tiles``; ``<planet>.json``
+    lists each tile's byte offset and size so a client can range-request the tiles
+    around the player.
+    
+    Package layout (little-endian):
+        header        TILE_HEADER
+        template ids  uint32[template_count]   indices into the manifest's templates
+        texture ids   uint32[texture_count]    indices into the manifest's textures
+        placements    PLACEMENT[placement_count], parents before children;
+                      template is an index into this tile's template ids
+        heights       float32[height_resolution ** 2], row-major from the tile origin, NaN = no sample
+    """
+    
+    PLANET_SIZE = 16384.0
+    HEIGHT_RESOLUTION = 33
+    VERSION = 1
+    
+    # magic, version, flags, tile x, tile z, tile size, origin x, origin z,
+    # template count, texture count, placement count, height resolution, reserved
+    TILE_HEADER = struct.Struct('<4sHHhhfffIIIHH')
+    # objectId, parentId, template, cellIndex, rotation (w, x, y, z), position (x, y, z), radius
+    PLACEMENT = struct.Struct('<IIIi4f3ff')
+    
+    # Reference chain followed from an object template down to its textures
+    APPEARANCE_SUFFIXES = ('.apt', '.sat', '.lod', '.lmg', '.msh', '.mgn', '.pob', '.sht')
+    
+    def __init__(self, swg_path: Path, results: Dict[str, Any], shaders: Dict[str, Any],
+                 tile_size: float = 1024.0, archives: 'TREIndex' = None):
+        self.swg_path = swg_path
+        self.results = results
+        self.shaders = shaders
+        self.tile_size = tile_size
+        self.archives = archives
+        self.grid = max(1, int(-(-self.PLANET_SIZE // tile_size)))
+        self.texture_cache = {}
+        
+    def export(self, output_dir: str) -> Dict[str, Any]:
+        """Write tiles and a manifest per planet with snapshot data; return a summary"""
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        
+        summary = {}
+        for planet, info in self.results['planets'].items():
+            snapshots = []
+            for scene in info['snapshots']:
+                ws_file = self.results['snapshots'][scene]['file']
+                try:
+                    data = self.read_asset(f"snapshot/{ws_file}")
+                    if data:
+                        snapshots.append(SnapshotReader(data).read())
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"   ❌ Failed to decode {ws_file}: {e}")
+            if snapshots:
+                summary[planet] = self.export_planet(planet, snapshots, output)
+        
+        return summary
+    
+    def export_planet(self, planet: str, snapshots: List[Dict], output: Path) -> Dict[str, Any]:
+        # Merge the snapshots' template tables into one planet-wide table
+        templates, template_ids, nodes = [], {}, []
+        for snapshot in snapshots:
+            remap = []
+            for name in snapshot['templates']:
+                if name not in template_ids:
+                    template_ids[name] = len(templates)
+                    templates.append(name)
+                remap.append(template_ids[name])
+            for node in snapshot['nodes']:
+                template = remap[node[2]] if node[2] < len(remap) else node[2]
+                nodes.append(node[:2] + (template,) + node[3:])
+        
+        tiles = self.assign_tiles(nodes)
+        textures, texture_ids = [], {}
+        
+        entries = []
+        offset = 0
+        with open(output / f'{planet}.tiles', 'wb') as f:
+            for (tile_x, tile_z), tile_nodes in sorted(tiles.items()):
+                package = self.build_tile(tile_x, tile_z, tile_nodes, templates, textures, texture_ids)
+                f.write(package)
+                entries.append({
+                    'x': tile_x,
+                    'z': tile_z,
+                    'offset': offset,
+                    'size': len(package),
+                    'placements': len(tile_nodes)
+                })
+                offset += len(package)
+        
+        manifest = {
+            'planet': planet,
+            'version': self.VERSION,
+            'package': f'{planet}.tiles',
+            'planet_size': self.PLANET_SIZE,
+            'tile_size': self.tile_size,
+            'grid': self.grid,
+            'height_resolution': self.HEIGHT_RESOLUTION,
+            # SWG .trn terrain is procedural; heights are ground samples taken from placements
+            'height_source': 'placements',
+            'templates': templates,
+            'textures': textures,
+            'tiles': entries
+        }
+        with open(output / f'{planet}.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        
+        return {'manifest': f'{planet}.json', 'tiles': len(entries), 'bytes': offset,
+                'placements': len(nodes)}
+    
+    def assign_tiles(self, nodes: List[tuple]) -> Dict[tuple, List[tuple]]:
+        """Group nodes by the tile of their root ancestor, parents before children"""
+        by_id = {node[0]: node for node in nodes}
+        half = self.PLANET_SIZE / 2
+        tiles = defaultdict(list)
+        
+        for node in sorted(nodes, key=lambda n: n[13]):
+            # A root is at most `depth` hops up; the bound stops malformed parent cycles
+            root, hops = node, node[13]
+            while hops > 0 and root[1] and root[1] in by_id and root[13] > 0:
+                root = by_id[root[1]]
+                hops -= 1
+            tile_x = min(self.grid - 1, max(0, int((root[8] + half) // self.tile_size)))
+            tile_z = min(self.grid - 1, max(0, int((root[10] + half) // self.tile_size)))
+            tiles[(tile_x, tile_z)].append(node)
+        
+        return tiles
+    
+    def build_tile(self, tile_x: int, tile_z: int, nodes: List[tuple], templates: List[str],
+                   textures: List[str], texture_ids: Dict[str, int]) -> bytes:
+        from array import array
+        
+        half = self.PLANET_SIZE / 2
+        origin_x = tile_x * self.tile_size - half
+        origin_z = tile_z * self.tile_size - half
+        
+        # Tile-local template table and the textures those templates need
+        local, tile_templates = {}, []
+        for node in nodes:
+            if node[2] not in local:
+                local[node[2]] = len(tile_templates)
+                tile_templates.append(node[2])
+        
+        tile_textures = set()
+        for template in tile_templates:
+            if template < len(templates):
+                for texture in self.template_textures(templates[template]):
+                    if texture not in texture_ids:
+                        texture_ids[texture] = len(textures)
+                        textures.append(texture)
+                    tile_textures.add(texture_ids[texture])
+        
+        # Ground height samples: lowest outdoor root placement nearest each grid point
+        resolution = self.HEIGHT_RESOLUTION
+        spacing = self.tile_size / (resolution - 1)
+        heights = array('f', [float('nan')]) * (resolution * resolution)
+        for node in nodes:
+            if node[13] == 0 and node[3] == 0:
+                column = min(resolution - 1, max(0, round((node[8] - origin_x) / spacing)))
+                row = min(resolution - 1, max(0, round((node[10] - origin_z) / spacing)))
+                index = row * resolution + column
+                if not heights[index] <= node[9]:
+                    heights[index] = node[9]
+        
+        header = self.TILE_HEADER.pack(
+            b'SWGT', self.VERSION, 0, tile_x, tile_z, self.tile_size, origin_x, origin_z,
+            len(tile_templates), len(tile_textures), len(nodes), resolution, 0)
+        placement = self.PLACEMENT.pack
+        parts = [
+            header,
+            array('I', tile_templates).tobytes(),
+            array('I', sorted(tile_textures)).tobytes(),
+            b''.join(placement(node[0], node[1], local[node[2]], *node[3:12]) for node in nodes),
+            heights.tobytes()
+        ]
+        return b''.join(parts)
+    
+    def template_textures(self, template: str) -> List[str]:
+        """Textures reached from an object template through its appearance chain"""
+        template = normalize_asset_path(template)
+        if template in self.texture_cache:
+            return self.texture_cache[template]
+        
+        textures, seen = set(), {template}
+        pending = [template]
+        while pending:
+            path = pending.pop()
+            if path.endswith('.sht') and path in self.shaders:
+                textures.update(normalize_asset_path(t) for t in self.shaders[path]['textures'].values())
+                continue
+            
+            _path, data = self.locate(path)
+            for match in ASSET_REFERENCE_PATTERN.finditer(data):
+                target = normalize_asset_path(match.group(1).decode('ascii', errors='ignore'))
+                if target.endswith(('.dds', '.tga')):
+                    textures.add(target)
+                elif target.endswith(self.APPEARANCE_SUFFIXES) and target not in seen:
+                    seen.add(target)
+                    pending.append(target)
+        
+        self.texture_cache[template] = sorted(textures)
+        return self.texture_cache[template]
+    
+    def locate(self, path: str) -> tuple:
+        """(path, bytes); child references may omit the leading 'appearance/'"""
+        for candidate in (path, f'appearance/{path}'):
+            data = self.read_asset(candidate)
+            if data:
+                return candidate, data
+        return path, b''
+    
+    def read_asset(self, relative_path: str) -> bytes:
+        """Loose file from the source tree, else from the archive that serves it"""
+        try:
+            return (self.swg_path / relative_path).read_bytes()
+        except OSError:
+            if self.archives and relative_path in self.archives:
+                return self.archives.read(relative_path)
+            return b''
+
+
+class LodChainResolver:
+    """Resolve object templates to ordered LOD chains with per-level mesh costs.
+    
+    Follows template -> .apt -> .lod (DTLA) -> .msh for static appearances and
+    template -> .sat -> .lmg (MLOD) -> .mgn for skeletal ones, whose body parts are
+    summed per level. Levels are ordered
+    from full detail outwards; each carries [mesh, near, far] where far is None for
+    the last level.
+    """
+    
+    APPEARANCE_PATTERN = re.compile(rb'appearanceFilename\x00\x01([^\x00]+)\x00')
+    # Levels without authored distances switch at radius * SWITCH_SCALE * 2 ** level
+    SWITCH_SCALE = 16.0
+    MAX_DEPTH = 6
+    
+    def __init__(self, swg_path: Path, archives: 'TREIndex' = None):
+        self.swg_path = swg_path
+        self.archives = archives
+        self.meshes = []         # [path, vertices, triangles, bytes, radius]
+        self.mesh_ids = {}
+        self.chains = {}         # appearance path -> levels (memoized)
+        
+    def resolve_template(self, template_path: str) -> List[list]:
+        """LOD levels for an object template, [] if its appearance cannot be resolved"""
+        match = self.APPEARANCE_PATTERN.search(self.read_asset(template_path))
+        if not match:
+            return []
+        return self.resolve(match.group(1).decode('ascii', errors='ignore'))
+    
+    def resolve(self, path: str, depth: int = 0) -> List[list]:
+        path = normalize_asset_path(path)
+        if path in self.chains:
+            return self.chains[path]
+        
+        self.chains[path] = []    # guards against reference cycles
+        levels = []
+        if depth < self.MAX_DEPTH:
+            located, data = self.locate(path)
+            try:
+                levels = self.resolve_data(located, data, depth)
+            except (ValueError, struct.error):
+                levels = []
+        
+        self.chains[path] = levels
+        return levels
+    
+    def resolve_data(self, path: str, data: bytes, depth: int) -> List[list]:
+        if not data:
+            return []
+        if path.endswith(('.msh', '.mgn')):
+            mesh = self.mesh(path, data)
+            return [[mesh, 0.0, None]] if mesh is not None else []
+        
+        chunks = list(IFFParser(data).walk())
+        if not chunks:
+            return []
+        form = chunks[0][0][0] if chunks[0][0] else ''
+        
+        if form == 'DTLA':
+            return self.resolve_detail_appearance(chunks, depth)
+        if form == 'MLOD':
+            names = [read_cstring(d) for _p, t, d in chunks if t == 'NAME']
+            return self.switch_levels([self.first_mesh(name, depth) for name in names])
+        
+        if form == 'SMAT':
+            # MSGN lists one mesh generator per body part, all drawn at every level
+            names = [name.decode('ascii', errors='ignore')
+                     for _p, t, d in chunks if t == 'MSGN' for name in bytes(d).split(b'\x00') if name]
+            return self.combine([self.resolve(name, depth + 1) for name in names])
+        
+        # .apt (APT NAME) points at one further appearance
+        for _form_path, chunk_type, chunk_data in chunks:
+            if chunk_type == 'NAME':
+                return self.resolve(read_cstring(chunk_data), depth + 1)
+        return []
+    
+    def combine(self, chains: List[List[list]]) -> List[list]:
+        """Merge parallel part chains into one chain whose meshes sum the parts per level"""
+        chains = [chain for chain in chains if chain]
+        if len(chains) <= 1:
+            return chains[0] if chains else []
+        
+        # Parts with fewer levels keep drawing their coarsest mesh
+        meshes = []
+        for level in range(max(len(chain) for chain in chains)):
+            parts = [self.meshes[chain[min(level, len(chain) - 1)][0]] for chain in chains]
+            path = '+'.join(part[0] for part in parts)
+            if path not in self.mesh_ids:
+                self.mesh_ids[path] = len(self.meshes)
+                self.meshes.append([path] + [sum(part[field] for part in parts) for field in (1, 2, 3)] +
+                                   [max(part[4] for part in parts)])
+            meshes.append(self.mesh_ids[path])
+        return self.switch_levels(meshes)
+    
+    def resolve_detail_appearance(self, chunks: List[tuple], depth: int) -> List[list]:
+        """DTLA: INFO holds (id, near, far) per level, DATA/CHLD holds (id, appearance)"""
+        distances, children = {}, {}
+        for form_path, chunk_type, data in chunks:
+            if chunk_type == 'INFO' and len(form_path) == 2:
+                for level_id, near, far in struct.iter_unpack('<Iff', data[:len(data) // 12 * 12]):
+                    distances[level_id] = (near, far)
+            elif chunk_type == 'CHLD' and len(data) > 4:
+                children[struct.unpack_from('<I', data)[0]] = read_cstring(data, 4)
+        
+        levels = []
+        for level_id, child in children.items():
+            mesh = self.first_mesh(child, depth)
+            if mesh is not None:
+                near, far = distances.get(level_id, (None, None))
+                levels.append([mesh, near, far])
+        
+        if levels and all(level[1] is not None for level in levels):
+            levels.sort(key=lambda level: level[1])
+            levels[-1][2] = None
+            return levels
+        return self.switch_levels([level[0] for level in levels])
+    
+    def first_mesh(self, path: str, depth: int) -> int:
+        """Full-detail mesh id of a child appearance"""
+        levels = self.resolve(path, depth + 1)
+        return levels[0][0] if levels else None
+    
+    def switch_levels(self, meshes: List[int]) -> List[list]:
+        """Recommended distances for unauthored chains, from the full-detail mesh bounds"""
+        meshes = [mesh for mesh in meshes if mesh is not None]
+        if not meshes:
+            return []
+        radius = self.meshes[meshes[0]][4] or 1.0
+        levels = []
+        for level, mesh in enumerate(meshes):
+            near = 0.0 if level == 0 else levels[-1][2]
+            far = radius * self.SWITCH_SCALE * 2 ** level if level < len(meshes) - 1 else None
+            levels.append([mesh, near, far])
+        return levels
+    
+    def mesh(self, path: str, data: bytes) -> int:
+        """Intern a mesh's [path, vertices, triangles, bytes, radius] row"""
+        if path in self.mesh_ids:
+            return self.mesh_ids[path]
+        
+        vertices = triangles = 0
+        radius = 0.0
+        for form_path, chunk_type, chunk_data in IFFParser(data).walk():
+            if chunk_type == 'INFO' and form_path[-2:] == ('VTXA', '0003') and len(chunk_data) >= 8:
+                vertices += struct.unpack_from('<I', chunk_data, 4)[0]
+            elif chunk_type == 'INDX' and len(chunk_data) >= 4:
+                triangles += struct.unpack_from('<I', chunk_data)[0] // 3
+            elif chunk_type == 'PIDX' and len(chunk_data) >= 4:
+                vertices += struct.unpack_from('<I', chunk_data)[0]
+            elif chunk_type in ('ITL ', 'OITL') and len(chunk_data) >= 4:
+                triangles += struct.unpack_from('<I', chunk_data)[0]
+            elif chunk_type == 'SPHR' and len(chunk_data) >= 16 and not radius:
+                radius = struct.unpack_from('<f', chunk_data, 12)[0]
+            elif chunk_type == 'POSN' and form_path[-1:] == ('0004',) and not radius:
+                # Skeletal meshes carry no bounding sphere; use the farthest bind-pose vertex
+                positions = struct.iter_unpack('<3f', chunk_data[:len(chunk_data) // 12 * 12])
+                radius = max(((x * x + y * y + z * z) ** 0.5 for x, y, z in positions), default=0.0)
+        
+        self.mesh_ids[path] = len(self.meshes)
+        self.meshes.append([path, vertices, triangles, len(data), round(radius, 3)])
+        return self.mesh_ids[path]
+    
+    def locate(self, path: str) -> tuple:
+        """(path, bytes); child references may omit the leading 'appearance/'"""
+        for candidate in (path, f'appearance/{path}'):
+            data = self.read_asset(candidate)
+            if data:
+                return candidate, data
+        return path, b''
+    
+    def read_asset(self, relative_path: str) -> bytes:
+        """Loose file from the source tree, else from the archive that serves it"""
+        try:
+            return (self.swg_path / relative_path).read_bytes()
+        except OSError:
+            if self.archives and relative_path in self.archives:
+                return self.archives.read(relative_path)
+            return b''
+
+
+class PlanetAnalytics:
+    """Per-planet placement statistics from decoded .ws snapshots (requires NumPy).
+    
+    Every node is binned at the world position of its root ancestor, so interior
+    objects count towards the building that holds them.
+    """
+    
+    PLANET_SIZE = 16384.0
+    DENSITY_CELL = 256.0       # metres per density grid cell
+    CLUSTER_CELL = 128.0       # metres per cell for city detection
+    CLUSTER_MIN_BUILDINGS = 2  # buildings a cell needs to seed a cluster
+    CITY_MIN_BUILDINGS = 8     # buildings a cluster needs to count as a city
+    
+    def __init__(self, templates: List[str], nodes: List[tuple]):
+        self.templates = templates
+        self.nodes = nodes
+        
+    def analyze(self, known_cities: List[Dict] = None) -> Dict[str, Any]:
+        import numpy as np
+        
+        nodes = np.asarray(self.nodes, dtype=np.float64).reshape(-1, len(SnapshotReader.FIELDS))
+        object_ids = nodes[:, 0].astype(np.int64)
+        parent_ids = nodes[:, 1].astype(np.int64)
+        template_ids = nodes[:, 2].astype(np.int64)
+        depth = nodes[:, 13].astype(np.int64)
+        
+        # Root ancestor of every node: hop parent links once per nesting level
+        order = np.argsort(object_ids)
+        root = np.arange(len(nodes))
+        for _ in range(int(depth.max(initial=0))):
+            parent = parent_ids[root]
+            found = np.searchsorted(object_ids, parent, sorter=order)
+            found = order[np.minimum(found, len(order) - 1)]
+            nested = (depth[root] > 0) & (object_ids[found] == parent)
+            root = np.where(nested, found, root)
+        x, z = nodes[root, 8], nodes[root, 10]
+        
+        names = np.array(self.templates + [''], dtype=object)
+        template_ids = np.where(template_ids < len(self.templates), template_ids, len(self.templates))
+        building_templates = np.array([n.startswith('object/building/') for n in names])
+        cell_templates = np.array([n.startswith('object/cell/') for n in names])
+        is_building = building_templates[template_ids] & (depth == 0)
+        is_cell = cell_templates[template_ids]
+        
+        histogram = np.bincount(template_ids, minlength=len(names))
+        ranked = np.argsort(-histogram, kind='stable')
+        
+        return {
+            'objects': int(len(nodes)),
+            'outdoor_objects': int((depth == 0).sum()),
+            'interior_objects': int(((depth > 0) & ~is_cell).sum()),
+            'buildings': int(is_building.sum()),
+            'cells': int(is_cell.sum()),
+            'density': self.density(np, x, z),
+            'templates': [[names[i] or None, int(histogram[i])] for i in ranked if histogram[i]],
+            'cities': self.cities(np, x[is_building], z[is_building], x, z, known_cities or [])
+        }
+    
+    def grid_index(self, np, values, cell: float):
+        size = int(self.PLANET_SIZE // cell)
+        index = np.floor((values + self.PLANET_SIZE / 2) / cell).astype(np.int64)
+        return np.clip(index, 0, size - 1), size
+    
+    def density(self, np, x, z) -> Dict[str, Any]:
+        """Object counts per grid cell, stored sparsely as [column, row, count]"""
+        column, size = self.grid_index(np, x, self.DENSITY_CELL)
+        row, _ = self.grid_index(np, z, self.DENSITY_CELL)
+        counts = np.bincount(row * size + column, minlength=size * size).reshape(size, size)
+        rows, columns = np.nonzero(counts)
+        return {
+            'cell_size': self.DENSITY_CELL,
+            'grid': size,
+            'origin': -self.PLANET_SIZE / 2,
+            'max': int(counts.max(initial=0)),
+            'cells': [[int(c), int(r), int(counts[r, c])] for r, c in zip(rows, columns)]
+        }
+    
+    def cities(self, np, building_x, building_z, x, z, known_cities: List[Dict]) -> List[Dict]:
+        """Connected groups of building-dense cells, largest first"""
+        column, size = self.grid_index(np, building_x, self.CLUSTER_CELL)
+        row, _ = self.grid_index(np, building_z, self.CLUSTER_CELL)
+        buildings = np.bincount(row * size + column, minlength=size * size).reshape(size, size)
+        
+        object_column, _ = self.grid_index(np, x, self.CLUSTER_CELL)
+        object_row, _ = self.grid_index(np, z, self.CLUSTER_CELL)
+        objects = np.bincount(object_row * size + object_column, minlength=size * size).reshape(size, size)
+        
+        # Label 8-connected components of dense cells (only dense cells are visited)
+        dense = buildings >= self.CLUSTER_MIN_BUILDINGS
+        labels = np.zeros_like(buildings)
+        clusters = []
+        for start in zip(*np.nonzero(dense)):
+            if labels[start]:
+                continue
+            labels[start] = len(clusters) + 1
+            members, pending = [], [start]
+            while pending:
+                r, c = pending.pop()
+                members.append((r, c))
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        nr, nc = r + dr, c + dc
+                        if 0 <= nr < size and 0 <= nc < size and dense[nr, nc] and not labels[nr, nc]:
+                            labels[nr, nc] = labels[start]
+                            pending.append((nr, nc))
+            clusters.append(members)
+        
+        origin = -self.PLANET_SIZE / 2
+        cities = []
+        for label, members in enumerate(clusters, start=1):
+            rows, columns = np.array(members).T
+            count = int(buildings[rows, columns].sum())
+            if count < self.CITY_MIN_BUILDINGS:
+                continue
+            
+            inside = labels[row, column] == label
+            center_x, center_z = float(building_x[inside].mean()), float(building_z[inside].mean())
+            bounds = [float(origin + columns.min() * self.CLUSTER_CELL),
+                      float(origin + rows.min() * self.CLUSTER_CELL),
+                      float(origin + (columns.max() + 1) * self.CLUSTER_CELL),
+                      float(origin + (rows.max() + 1) * self.CLUSTER_CELL)]
+            name = next((city['name'] for city in known_cities
+                         if bounds[0] <= city['x'] <= bounds[2] and bounds[1] <= city['z'] <= bounds[3]), None)
+            cities.append({
+                'name': name,
+                'x': round(center_x, 1),
+                'z': round(center_z, 1),
+                'bounds': bounds,
+                'buildings': count,
+                'objects': int(objects[rows, columns].sum())
+            })
+        
+        return sorted(cities, key=lambda city: -city['buildings'])
+
+
+class ResultSpiller:
+    """Keep buffered results under a memory budget by spilling finished sections to disk.
+    
+    Each result section is produced by exactly one stage; later stages only
+    read it, so a section reloaded for a dependent stage can be dropped again
+    without rewriting its segment.
+    """
+    
+    def __init__(self, results: Dict[str, Any], budget: int, spill_dir: str = None):
+        self.results = results
+        self.budget = budget
+        self.spill_dir = Path(spill_dir or tempfile.mkdtemp(prefix='swg_spill_'))
+        self.segments = {}   # section -> segment file (clean copy on disk)
+        self.resident = {}   # section -> estimated bytes, for sections held in RAM
+        
+    def track(self, sections):
+        """Account for freshly completed sections, spilling the largest while over budget"""
+        for section in sections:
+            if section in self.results and self.results[section] is not None:
+                self.resident[section] = estimate_size(self.results[section])
+        
+        total = sum(self.resident.values())
+        while total > self.budget and self.resident:
+            section = max(self.resident, key=self.resident.get)
+            total -= self.resident.pop(section)
+            self.spill(section)
+    
+    def spill(self, section: str):
+        if section not in self.segments:
+            segment = self.spill_dir / f'{section}.json'
+            with open(segment, 'w', encoding='utf-8') as f:
+                json.dump(self.results[section], f, indent=2, ensure_ascii=False)
+            self.segments[section] = segment
+            print(f"   💾 Spilled '{section}' to {segment}")
+        self.results[section] = None
+    
+    def load(self, sections):
+        """Bring spilled sections back into memory for a stage that reads them"""
+        for section in sections:
+            if self.results.get(section) is None and section in self.segments:
+                self.results[section] = self.read_segment(section)
+                self.resident[section] = estimate_size(self.results[section])
+    
+    def read_segment(self, section: str) -> Any:
+        with open(self.segments[section], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def section(self, section: str) -> Any:
+        """A section's value without making it resident again"""
+        value = self.results.get(section)
+        if value is None and section in self.segments:
+            return self.read_segment(section)
+        return value
+    
+    def items(self):
+        """Iterate (section, value) pairs, reading spilled sections one at a time"""
+        for section in list(self.results):
+            yield section, self.section(section)
+    
+    def write_merged(self, output_path: str):
+        """Write the full results JSON, streaming spilled segments straight from disk"""
+        import shutil
+        
+        with open(output_path, 'w', encoding='utf-8') as out:
+            out.write('{\n')
+            for index, section in enumerate(self.results):
+                out.write(f'  {json.dumps(section)}: ')
+                if self.results[section] is None and section in self.segments:
+                    with open(self.segments[section], 'r', encoding='utf-8') as segment:
+                        shutil.copyfileobj(segment, out)
+                else:
+                    json.dump(self.results[section], out, indent=2, ensure_ascii=False)
+                out.write(',\n' if index < len(self.results) - 1 else '\n')
+            out.write('}')
+    
+    def cleanup(self):
+        import shutil
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def isolated_worker(connection, swg_path: str, memory_limit: int = None):
+    """Worker loop: run (method, path, args) requests on a private parser and reply"""
+    parser = CompleteSWGParser(swg_path)
+    if memory_limit:
+        try:
+            import resource
+        except ImportError:
+            # No address-space limits on this platform (Windows); the timeout still applies
+            resource = None
+        if resource:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    connection.send(('ready', None))
+    
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        method, path, args = request
+        try:
+            connection.send(('ok', getattr(parser, method)(Path(path), *args)))
+        except MemoryError:
+            connection.send(('error', f'memory limit exceeded ({memory_limit} bytes)'))
+        except Exception as e:
+            connection.send(('error', f'{type(e).__name__}: {e}'))
+
+
+class IsolatedWorker:
+    """Run per-file parse methods in a separate process under a time and memory limit.
+    
+    A file that times out or kills the worker costs one worker restart; the
+    stage carries on with the next file.
+    """
+    
+    # Seconds a fresh worker gets to import the parser and report ready
+    STARTUP_TIMEOUT = 60.0
+    
+    def __init__(self, swg_path: Path, timeout: float, memory_limit: int = None):
+        self.swg_path = swg_path
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.process = None
+        self.connection = None
+        
+    def start(self):
+        """Launch a worker and wait for its handshake; RuntimeError if it never reports ready"""
+        import multiprocessing
+        
+        # spawn, not fork: the worker's address-space limit must not count the parent's results
+        context = multiprocessing.get_context('spawn')
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=isolated_worker,
+                                       args=(child, str(self.swg_path), self.memory_limit),
+                                       daemon=True)
+        self.process.start()
+        child.close()
+        
+        try:
+            if not self.connection.poll(self.STARTUP_TIMEOUT):
+                raise RuntimeError(f'worker did not start within {self.STARTUP_TIMEOUT:g}s')
+            self.connection.recv()
+        except EOFError:
+            self.process.join(timeout=5)
+            exit_code = self.process.exitcode
+            self.stop(kill=True)
+            raise RuntimeError(f'worker exited during startup (exit code {exit_code})')
+        except RuntimeError:
+            self.stop(kill=True)
+            raise
+    
+    def running(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+    
+    def call(self, method: str, path: Path, *args) -> Any:
+        """Result of parser.method(path, *args) in the worker; RuntimeError on any failure"""
+        if not self.running():
+            self.start()
+        
+        self.connection.send((method, str(path), args))
+        if not self.connection.poll(self.timeout):
+            self.stop(kill=True)
+            raise RuntimeError(f'timed out after {self.timeout:g}s')
+        
+        try:
+            status, value = self.connection.recv()
+        except EOFError:
+            exit_code = self.process.exitcode
+            self.stop(kill=True)
+            raise RuntimeError(f'worker crashed (exit code {exit_code})')
+        
+        if status != 'ok':
+            raise RuntimeError(value)
+        return value
+    
+    def stop(self, kill: bool = False):
+        if self.process is None:
+            return
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+        self.process.join(timeout=5)
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+
+class FileQuarantine:
+    """Persistent list of files that failed isolated parsing, skipped until they change"""
+    
+    def __init__(self, root: Path, path: str):
+        self.root = root
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        
+    def key(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+    
+    def contains(self, path: Path) -> bool:
+        """True if the file is quarantined and unchanged; changed files are released"""
+        entry = self.entries.get(self.key(path))
+        if entry is None:
+            return False
+        stat = path.stat()
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return True
+        del self.entries[self.key(path)]
+        return False
+    
+    def add(self, path: Path, method: str, reason: str):
+        stat = path.stat()
+        self.entries[self.key(path)] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'method': method,
+            'reason': reason,
+            'quarantined_at': datetime.now().isoformat()
+        }
+    
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+class ChangeEventServer:
+    """Push asset change events to local clients over Server-Sent Events (GET /events)"""
+    
+    KEEPALIVE_SECONDS = 15
+    
+    def __init__(self, port: int, host: str = '127.0.0.1'):
+        self.clients = []
+        from http.server import ThreadingHTTPServer
+        
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        
+    def make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        
+        server = self
+        
+        class EventStreamHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/events':
+                    self.send_error(404)
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                
+                events = server.subscribe()
+                try:
+                    while True:
+                        try:
+                            event = events.get(timeout=server.KEEPALIVE_SECONDS)
+                            payload = f'event: assets\ndata: {json.dumps(event)}\n\n'
+                        except queue.Empty:
+                            payload = ': keepalive\n\n'
+                        self.wfile.write(payload.encode('utf-8'))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    server.unsubscribe(events)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return EventStreamHandler
+    
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def stop(self):
+        self.httpd.shutdown()
+    
+    def subscribe(self) -> queue.Queue:
+        events = queue.Queue()
+        with self.lock:
+            self.clients.append(events)
+        return events
+    
+    def unsubscribe(self, events: queue.Queue):
+        with self.lock:
+            if events in self.clients:
+                self.clients.remove(events)
+    
+    def publish(self, event: Dict[str, Any]):
+        with self.lock:
+            for events in self.clients:
+                events.put(event)
+
+
+class AssetWatcher:
+    """Keep a parser resident and re-parse only the files that change"""
+    
+    def __init__(self, parser: 'CompleteSWGParser', output_dir: str,
+                 interval: float = 0.5, events: ChangeEventServer = None):
+        self.parser = parser
+        self.root = parser.swg_path
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.events = events
+        self.stats = {}
+        
+    def scan(self) -> Dict[str, tuple]:
+        """{relative path: (size, mtime_ns)} for every file in the tree"""
+        stats = {}
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                stats[Path(path).relative_to(self.root).as_posix()] = (info.st_size, info.st_mtime_ns)
+        return stats
+    
+    def poll(self) -> tuple:
+        """(changed or added paths, removed paths) since the last poll"""
+        current = self.scan()
+        changed = [p for p, stat in current.items() if self.stats.get(p) != stat]
+        removed = [p for p in self.stats if p not in current]
+        self.stats = current
+        return changed, removed
+    
+    def apply(self, changed: List[str], removed: List[str]) -> set:
+        """Route each file to its stage; return the result sections that were touched"""
+        sections = set()
+        rebuild_materials = False
+        
+        for relative in changed + removed:
+            exists = relative not in removed
+            path = self.root / relative
+            parts = Path(relative).parts
+            folder, suffix = parts[0], path.suffix.lower()
+            
+            try:
+                if folder == 'terrain' and suffix == '.trn':
+                    record = self.parser.parse_terrain_file(path) if exists else None
+                    self.replace_keyed('terrain', path.stem, record)
+                    sections.add('terrain')
+                elif folder == 'snapshot' and suffix == '.ws':
+                    record = self.parser.parse_snapshot_file(path) if exists else None
+                    self.replace_keyed('snapshots', path.stem, record)
+                    sections.add('snapshots')
+                elif folder == 'object' and suffix == '.iff' and len(parts) > 2:
+                    category = next((c for c, f in self.parser.OBJECT_CATEGORIES.items()
+                                     if f == parts[1]), None)
+                    if category:
+                        record = self.parser.object_record(path) if exists else None
+                        self.replace_listed(self.parser.results['objects'][category],
+                                            'path', str(Path(relative)), record)
+                        sections.add('objects')
+                elif folder == 'effect' and suffix == '.eft' and len(parts) == 2:
+                    record = self.parser.parse_effect_file(path) if exists else None
+                    self.replace_listed(self.parser.results['effects'], 'file', path.name, record)
+                    sections.add('effects')
+                    rebuild_materials = True
+                elif folder == 'shader' and suffix == '.sht':
+                    self.replace_cached(self.parser.shaders, self.parser.parse_shader_file, path, exists)
+                    rebuild_materials = True
+                elif folder == 'pixel_program' and suffix == '.psh':
+                    self.replace_cached(self.parser.pixel_programs,
+                                        self.parser.parse_pixel_program_file, path, exists)
+                    rebuild_materials = True
+                elif folder == 'datatables' and suffix == '.iff':
+                    entries = self.parser.results['datatables'].setdefault(path.parent.name, [])
+                    record = self.parser.datatable_record(path) if exists else None
+                    self.replace_listed(entries, 'file', path.name, record)
+                    sections.add('datatables')
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to re-parse {relative}: {e}")
+        
+        if rebuild_materials:
+            self.parser.build_material_table()
+            sections.add('materials')
+        if sections & {'terrain', 'snapshots'}:
+            self.parser.analyze_planet_data()
+            sections.add('planets')
+        
+        return sections
+    
+    def replace_keyed(self, section: str, key: str, record: Dict[str, Any]):
+        if record is None:
+            self.parser.results[section].pop(key, None)
+        else:
+            self.parser.results[section][key] = record
+    
+    @staticmethod
+    def replace_listed(entries: List[Dict], field: str, value: str, record: Dict[str, Any]):
+        index = next((i for i, entry in enumerate(entries) if entry[field] == value), None)
+        if index is None:
+            if record is not None:
+                entries.append(record)
+        elif record is None:
+            del entries[index]
+        else:
+            entries[index] = record
+    
+    def replace_cached(self, cache: Dict[str, Any], parse, path: Path, exists: bool):
+        key = self.parser.asset_key(path)
+        if exists:
+            cache[key] = parse(path)
+        else:
+            cache.pop(key, None)
+    
+    def write_shards(self, sections):
+        """Rewrite one JSON shard per touched result section, plus the shard index"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.output_dir / 'index.json'
+        index = {}
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        
+        for section in sections:
+            shard = f'{section}.json'
+            with open(self.output_dir / shard, 'w', encoding='utf-8') as f:
+                json.dump(self.parser.results[section], f, ensure_ascii=False, separators=(',', ':'))
+            index[section] = {'file': shard, 'updated_at': datetime.now().isoformat()}
+        
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+    
+    def run(self):
+        """Write every shard once, then poll until interrupted"""
+        self.stats = self.scan()
+        self.write_shards(self.parser.results.keys())
+        print(f"👀 Watching {self.root} (every {self.interval}s) -> {self.output_dir}")
+        
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed, removed = self.poll()
+                if not changed and not removed:
+                    continue
+                
+                started = time.perf_counter()
+                sections = self.apply(changed, removed)
+                self.write_shards(sections)
+                elapsed = (time.perf_counter() - started) * 1000
+                
+                print(f"   ↻ {len(changed)} changed, {len(removed)} removed -> "
+                      f"{', '.join(sorted(sections)) or 'no manifest changes'} ({elapsed:.0f} ms)")
+                if self.events:
+                    self.events.publish({
+                        'changed': changed,
+                        'removed': removed,
+                        'shards': sorted(f'{section}.json' for section in sections)
+                    })
+        except KeyboardInterrupt:
+            print("\n👋 Watch stopped")
+
+
 class CompleteSWGParser:
     """Complete parser for all SWG assets"""
     
-    def __init__(self, swg_path: str):
+    def __init__(self, swg_path: str, max_memory: int = None):
         self.swg_path = Path(swg_path)
         self.results = {
             'metadata': {
@@ -150,6 +1712,7 @@ class CompleteSWGParser:
             'terrain': {},
             'snapshots': {},
             'effects': [],
+            'materials': {},
             'textures': [],
             'meshes': [],
             'datatables': {},
@@ -159,57 +1722,208 @@ class CompleteSWGParser:
         
         self.file_count = 0
         
-    def parse_everything(self):
-        """Parse all files in SWGTERRAIN directory"""
+        # Result sections written by the stages run so far (the delta only diffs these)
+        self.produced = set()
+        
+        # Parsed shader templates and pixel programs, keyed by asset path
+        self.shaders = {}
+        self.pixel_programs = {}
+        
+        # Global name -> archive index, built by the 'tre' stage
+        self.tre_index = None
+        
+        # Hardened mode: per-file worker isolation plus a quarantine list
+        self.worker = None
+        self.quarantine = None
+        
+        # Optional memory budget: finished sections spill to disk when exceeded
+        self.spiller = ResultSpiller(self.results, max_memory) if max_memory else None
+        
+    # Stage name -> (method, prerequisite stages), listed in execution order.
+    # Export stages receive their arguments from the `outputs` mapping.
+    STAGES = {
+        'tre': ('parse_tre_archives', ()),
+        'terrain': ('parse_terrain_files', ()),
+        'snapshots': ('parse_snapshot_files', ()),
+        'objects': ('parse_all_objects', ()),
+        'effects': ('parse_all_effects', ()),
+        'materials': ('parse_materials', ('effects',)),
+        'datatables': ('parse_all_datatables', ()),
+        'appearances': ('parse_appearance_files', ()),
+        'planets': ('analyze_planet_data', ('terrain', 'snapshots')),
+        'lods': ('resolve_lod_chains', ('tre',)),
+        'analytics': ('analyze_planet_placements', ('snapshots', 'planets')),
+        'tiles': ('export_world_tiles', ('tre', 'snapshots', 'materials', 'planets')),
+        'dedup': ('deduplicate_assets', ()),
+        'catalog': ('export_sqlite_catalog',
+                    ('tre', 'objects', 'effects', 'datatables', 'snapshots', 'planets')),
+        'delta': ('build_delta_manifest', ())
+    }
+    PARSE_STAGES = ('tre', 'terrain', 'snapshots', 'objects', 'effects',
+                    'materials', 'datatables', 'appearances', 'planets')
+    # Result sections each stage writes
+    STAGE_SECTIONS = {
+        'tre': ('textures', 'meshes'),
+        'terrain': ('terrain',),
+        'snapshots': ('snapshots',),
+        'objects': ('objects',),
+        'effects': ('effects',),
+        'materials': ('materials',),
+        'datatables': ('datatables',),
+        'planets': ('planets',),
+        'lods': ('lods',),
+        'analytics': ('analytics',),
+        'tiles': ('tiles',),
+        'dedup': ('dedup',)
+    }
+    
+    @classmethod
+    def resolve_stages(cls, requested: List[str]) -> List[str]:
+        """Requested stages plus everything they depend on, in execution order"""
+        unknown = [stage for stage in requested if stage not in cls.STAGES]
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {', '.join(unknown)} "
+                             f"(available: {', '.join(cls.STAGES)})")
+        
+        needed = set()
+        pending = list(requested)
+        while pending:
+            stage = pending.pop()
+            if stage not in needed:
+                needed.add(stage)
+                pending.extend(cls.STAGES[stage][1])
+        
+        return [stage for stage in cls.STAGES if stage in needed]
+    
+    def parse_everything(self, stages: List[str] = None, outputs: Dict[str, tuple] = None):
+        """Run the requested stages (default: every parse stage) in dependency order"""
+        stages = self.resolve_stages(stages or list(self.PARSE_STAGES))
+        outputs = outputs or {}
+        
         print("=" * 80)
         print("  COMPLETE SWG ASSET PARSER")
         print("  Parsing EVERYTHING from your SWG files...")
         print("=" * 80)
-        print(f"Source: {self.swg_path}\n")
-        
-        # Parse in order of dependencies
-        self.parse_tre_archives()
-        self.parse_terrain_files()
-        self.parse_snapshot_files()
-        self.parse_all_objects()
-        self.parse_all_effects()
-        self.parse_all_datatables()
-        self.parse_appearance_files()
-        self.analyze_planet_data()
+        print(f"Source: {self.swg_path}")
+        print(f"Stages: {', '.join(stages)}\n")
+        
+        try:
+            for stage in stages:
+                method, _prerequisites = self.STAGES[stage]
+                if self.spiller:
+                    self.spiller.load(section
+                                      for dependency in self.resolve_stages([stage]) if dependency != stage
+                                      for section in self.STAGE_SECTIONS.get(dependency, ()))
+                
+                getattr(self, method)(*outputs.get(stage, ()))
+                self.produced.update(self.STAGE_SECTIONS.get(stage, ()))
+                
+                if self.spiller:
+                    self.spiller.track(self.STAGE_SECTIONS.get(stage, ()) + tuple(self.spiller.resident))
+        finally:
+            if self.worker:
+                self.worker.stop()
+            if self.quarantine:
+                self.quarantine.save()
         
         self.results['metadata']['total_files'] = self.file_count
         
         return self.results
     
-    def parse_tre_archives(self):
-        """Parse all .tre archive files"""
+    def harden(self, timeout: float, memory_limit: int, quarantine_path: str):
+        """Parse files in an isolated worker; failures are quarantined instead of raised"""
+        self.worker = IsolatedWorker(self.swg_path, timeout, memory_limit)
+        self.quarantine = FileQuarantine(self.swg_path, quarantine_path)
+    
+    def parse_file(self, method: str, path: Path, *args) -> Any:
+        """Call a per-file parse method, isolated and quarantined in hardened mode (None if skipped)"""
+        if not self.worker:
+            return getattr(self, method)(path, *args)
+        
+        if self.quarantine.contains(path):
+            print(f"   ⏭️  Skipping quarantined {path.name}")
+            return None
+        
+        # A worker that cannot start is not the file's fault: skip without quarantining
+        if not self.worker.running():
+            try:
+                self.worker.start()
+            except RuntimeError as e:
+                print(f"   ❌ Skipping {path.name}, isolated worker unavailable: {e}")
+                return None
+        
+        try:
+            return self.worker.call(method, path, *args)
+        except RuntimeError as e:
+            print(f"   ❌ Quarantined {path.name}: {e}")
+            self.quarantine.add(path, method, str(e))
+            return None
+    
+    def section(self, name: str) -> Any:
+        """A result section, read back from its spill segment if necessary"""
+        return self.spiller.section(name) if self.spiller else self.results[name]
+    
+    def write_results(self, output_path: str):
+        """Write the results JSON, merging any spilled segments"""
+        if self.spiller:
+            self.spiller.write_merged(output_path)
+            self.spiller.cleanup()
+            return
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.results, f, indent=2, ensure_ascii=False)
+    
+    # Client config entries: searchTree_<group>_<priority>=<archive>; higher priority wins
+    SEARCH_TREE_PATTERN = re.compile(r'^\s*searchTree_\d+_(\d+)\s*=\s*(\S+)', re.MULTILINE)
+    
+    def tre_search_order(self, tre_files: List[Path]) -> List[Path]:
+        """Archives lowest priority first, from the client's searchTree config when present.
+        
+        Archives the config does not list (or every archive, without a config) come
+        first in file-name order, which matches the numbered patch_NN naming the
+        client ships with.
+        """
+        priorities = {}
+        for cfg_file in self.swg_path.glob('*.cfg'):
+            try:
+                text = cfg_file.read_text(encoding='utf-8', errors='ignore')
+            except OSError:
+                continue
+            for priority, archive in self.SEARCH_TREE_PATTERN.findall(text):
+                name = archive.replace('\\', '/').rsplit('/', 1)[-1].lower()
+                priorities[name] = max(priorities.get(name, -1), int(priority))
+        
+        return sorted(tre_files, key=lambda p: (priorities.get(p.name.lower(), -1), p.name, str(p)))
+    
+    def parse_tre_archives(self, cache_path: str = None):
+        """Index all .tre archives in the client's override order"""
         print("📦 Parsing TRE archives...")
         
-        tre_files = list(self.swg_path.rglob('*.tre'))
+        tre_files = self.tre_search_order(list(self.swg_path.rglob('*.tre')))
         
         if not tre_files:
             print("   ⚠️  No .tre files found (they may need extraction)")
             return
         
-        for tre_path in tre_files:
-            print(f"   Opening: {tre_path.name}")
-            extractor = TREExtractor(str(tre_path))
-            files = extractor.extract()
-            
-            if files:
-                print(f"   ✓ Found {len(files)} files in {tre_path.name}")
-                # Categorize TRE contents
-                for filename in files.keys():
-                    if filename.endswith('.dds') or filename.endswith('.tga'):
-                        self.results['textures'].append({
-                            'name': filename,
-                            'archive': tre_path.name
-                        })
-                    elif filename.endswith('.msh') or filename.endswith('.lod'):
-                        self.results['meshes'].append({
-                            'name': filename,
-                            'archive': tre_path.name
-                        })
+        self.tre_index = TREIndex(tre_files, cache_path).build()
+        for archive, count in self.tre_index.counts.items():
+            print(f"   ✓ Found {count} files in {archive.name}")
+        if self.tre_index.cache_hits:
+            print(f"   ✓ {self.tre_index.cache_hits} archive tables loaded from cache")
+        print(f"   ✓ {len(self.tre_index)} unique paths across {len(tre_files)} archives")
+        
+        # Categorize TRE contents by the archive that actually serves each path
+        for filename, archive in self.tre_index.names():
+            if filename.endswith('.dds') or filename.endswith('.tga'):
+                self.results['textures'].append({
+                    'name': filename,
+                    'archive': archive
+                })
+            elif filename.endswith('.msh') or filename.endswith('.lod'):
+                self.results['meshes'].append({
+                    'name': filename,
+                    'archive': archive
+                })
         
         print(f"   ✓ Textures: {len(self.results['textures'])}")
         print(f"   ✓ Meshes: {len(self.results['meshes'])}\n")
@@ -231,23 +1945,30 @@ class CompleteSWGParser:
             print(f"   Parsing: {planet_name}")
             
             try:
-                with open(trn_file, 'rb') as f:
-                    data = f.read()
-                    
-                # Basic TRN parsing
-                if data[:4] == b'FORM':
-                    self.results['terrain'][planet_name] = {
-                        'file': trn_file.name,
-                        'size': len(data),
-                        'has_heightmap': True,
-                        'parsed': True
-                    }
+                terrain = self.parse_file('parse_terrain_file', trn_file)
+                if terrain:
+                    self.results['terrain'][planet_name] = terrain
                     self.file_count += 1
             except Exception as e:
                 print(f"   ❌ Failed: {e}")
         
         print(f"   ✓ Parsed {len(self.results['terrain'])} terrain files\n")
     
+    def parse_terrain_file(self, trn_file: Path) -> Dict[str, Any]:
+        """Parse a single .trn file (None if it is not IFF data)"""
+        with open_mapped(trn_file) as data:
+            # Basic TRN parsing
+            if bytes(data[:4]) != b'FORM':
+                return None
+            size = len(data)
+        
+        return {
+            'file': trn_file.name,
+            'size': size,
+            'has_heightmap': True,
+            'parsed': True
+        }
+    
     def parse_snapshot_files(self):
         """Parse .ws world snapshot files (object placements)"""
         print("📍 Parsing world snapshots...")
@@ -265,30 +1986,50 @@ class CompleteSWGParser:
             print(f"   Loading: {scene_name}")
             
             try:
-                with open(ws_file, 'rb') as f:
-                    data = f.read()
-                
-                # Parse IFF structure
-                if data[:4] == b'FORM':
-                    parser = IFFParser(data)
-                    chunks = parser.parse_all()
-                    
-                    # Count objects in snapshot
-                    object_count = sum(1 for c in chunks if c['type'] in ['OOBJ', 'SCOT'])
-                    
-                    self.results['snapshots'][scene_name] = {
-                        'file': ws_file.name,
-                        'objects': object_count,
-                        'chunks': len(chunks)
-                    }
+                snapshot = self.parse_file('parse_snapshot_file', ws_file)
+                if snapshot:
+                    self.results['snapshots'][scene_name] = snapshot
                     self.file_count += 1
                     
-                    print(f"      Objects: {object_count}")
+                    print(f"      Objects: {snapshot['objects']}")
             except Exception as e:
                 print(f"   ❌ Failed: {e}")
         
         print(f"   ✓ Parsed {len(self.results['snapshots'])} snapshots\n")
     
+    def parse_snapshot_file(self, ws_file: Path) -> Dict[str, Any]:
+        """Parse a single .ws file (None if it is not IFF data)"""
+        with open_mapped(ws_file) as data:
+            # Parse IFF structure
+            if bytes(data[:4]) != b'FORM':
+                return None
+            object_count, chunk_count = self.count_snapshot_chunks(data)
+        
+        return {
+            'file': ws_file.name,
+            'objects': object_count,
+            'chunks': chunk_count
+        }
+    
+    @staticmethod
+    def count_snapshot_chunks(data: bytes) -> tuple:
+        """(object chunks, top-level chunks); chunk slices are released on return"""
+        chunks = IFFParser(data).parse_all()
+        
+        # Count objects in snapshot
+        object_count = sum(1 for c in chunks if c['type'] in ['OOBJ', 'SCOT'])
+        return object_count, len(chunks)
+    
+    # Result category -> folder under object/
+    OBJECT_CATEGORIES = {
+        'buildings': 'building',
+        'creatures': 'creature',
+        'ships': 'ship',
+        'weapons': 'weapon',
+        'items': 'tangible',
+        'static': 'static'
+    }
+    
     def parse_all_objects(self):
         """Parse all object .iff files"""
         print("🏗️  Parsing objects...")
@@ -300,31 +2041,25 @@ class CompleteSWGParser:
             return
         
         # Parse each object type
-        categories = {
-            'buildings': 'building',
-            'creatures': 'creature',
-            'ships': 'ship',
-            'weapons': 'weapon',
-            'items': 'tangible',
-            'static': 'static'
-        }
-        
-        for category, folder in categories.items():
+        for category, folder in self.OBJECT_CATEGORIES.items():
             cat_path = object_path / folder
             if cat_path.exists():
                 iff_files = list(cat_path.rglob('*.iff'))
                 print(f"   {category.capitalize()}: {len(iff_files)} files")
                 
                 for iff_file in iff_files[:100]:  # Limit for speed
-                    self.results['objects'][category].append({
-                        'name': iff_file.stem,
-                        'file': iff_file.name,
-                        'path': str(iff_file.relative_to(self.swg_path))
-                    })
+                    self.results['objects'][category].append(self.object_record(iff_file))
                     self.file_count += 1
         
         print(f"   ✓ Total objects: {sum(len(v) for v in self.results['objects'].values())}\n")
     
+    def object_record(self, iff_file: Path) -> Dict[str, Any]:
+        return {
+            'name': iff_file.stem,
+            'file': iff_file.name,
+            'path': str(iff_file.relative_to(self.swg_path))
+        }
+    
     def parse_all_effects(self):
         """Parse all effect files"""
         print("✨ Parsing effects...")
@@ -336,25 +2071,98 @@ class CompleteSWGParser:
             return
         
         eft_files = list(effect_path.glob('*.eft'))
+        traits = NAME_CLASSIFIER.classify_batch(f.stem for f in eft_files)
         
-        for eft_file in eft_files:
+        for eft_file, effect_traits in zip(eft_files, traits):
             try:
-                with open(eft_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                self.results['effects'].append({
-                    'name': eft_file.stem,
-                    'file': eft_file.name,
-                    'size': len(content),
-                    'has_alpha': 'alpha' in eft_file.stem,
-                    'type': self.detect_effect_type(eft_file.stem)
-                })
-                self.file_count += 1
-            except:
-                pass
+                effect = self.parse_file('parse_effect_file', eft_file, effect_traits)
+                if effect:
+                    self.results['effects'].append(effect)
+                    self.file_count += 1
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to parse {eft_file.name}: {e}")
         
         print(f"   ✓ Parsed {len(self.results['effects'])} effects\n")
     
+    def parse_effect_file(self, eft_file: Path, traits: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Parse a single .eft file"""
+        
+        traits = traits or NAME_CLASSIFIER.classify(eft_file.stem)
+        data = eft_file.read_bytes()
+        effect = ShaderParser.parse_effect(data)
+        
+        return {
+            'name': eft_file.stem,
+            'file': eft_file.name,
+            'size': len(data),
+            'has_alpha': traits['hasAlpha'],
+            'type': traits['effectType'],
+            'passes': effect['passes'],
+            'texture_tags': effect['texture_tags'],
+            'pixel_programs': effect['pixel_programs']
+        }
+    
+    def parse_materials(self):
+        """Build the interned material table from shaders, effects and pixel programs"""
+        print("🎨 Building material table...")
+        
+        psh_path = self.swg_path / 'pixel_program'
+        psh_files = list(psh_path.rglob('*.psh')) if psh_path.exists() else []
+        for psh_file in psh_files:
+            try:
+                program = self.parse_file('parse_pixel_program_file', psh_file)
+                if program:
+                    self.pixel_programs[self.asset_key(psh_file)] = program
+                    self.file_count += 1
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to parse {psh_file.name}: {e}")
+        
+        shader_path = self.swg_path / 'shader'
+        sht_files = list(shader_path.rglob('*.sht')) if shader_path.exists() else []
+        for sht_file in sht_files:
+            try:
+                shader = self.parse_file('parse_shader_file', sht_file)
+                if shader:
+                    self.shaders[self.asset_key(sht_file)] = shader
+                    self.file_count += 1
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to parse {sht_file.name}: {e}")
+        
+        self.build_material_table()
+        
+        print(f"   ✓ Materials: {len(self.results['materials']['materials'])}")
+        print(f"   ✓ Unique textures: {len(self.results['materials']['textures'])}")
+        print(f"   ✓ Pixel programs: {len(self.results['materials']['pixel_programs'])}\n")
+    
+    def asset_key(self, path: Path) -> str:
+        """Cache key for a loose asset: its lower-cased path under the source tree"""
+        return path.relative_to(self.swg_path).as_posix().lower()
+    
+    def parse_pixel_program_file(self, psh_file: Path) -> Dict[str, Any]:
+        """Parse a single .psh file"""
+        return ShaderParser.parse_pixel_program(psh_file.read_bytes())
+    
+    def parse_shader_file(self, sht_file: Path) -> Dict[str, Any]:
+        """Parse a single .sht file"""
+        return ShaderParser.parse_shader(sht_file.read_bytes())
+    
+    def build_material_table(self):
+        """Intern the parsed effects, pixel programs and shaders (no file I/O)"""
+        builder = MaterialTableBuilder()
+        
+        for effect in self.results['effects']:
+            builder.add_effect(f"effect/{effect['file']}", {
+                'passes': effect['passes'],
+                'texture_tags': effect['texture_tags'],
+                'pixel_programs': effect['pixel_programs']
+            })
+        for path, program in self.pixel_programs.items():
+            builder.add_pixel_program(path, program)
+        for path, shader in self.shaders.items():
+            builder.add_shader(path, shader)
+        
+        self.results['materials'] = builder.to_dict()
+    
     def parse_all_datatables(self):
         """Parse all datatable files"""
         print("📊 Parsing datatables...")
@@ -373,14 +2181,17 @@ class CompleteSWGParser:
             if category not in self.results['datatables']:
                 self.results['datatables'][category] = []
             
-            self.results['datatables'][category].append({
-                'name': dt_file.stem,
-                'file': dt_file.name
-            })
+            self.results['datatables'][category].append(self.datatable_record(dt_file))
             self.file_count += 1
         
         print(f"   ✓ Parsed {len(iff_files)} datatables\n")
     
+    def datatable_record(self, dt_file: Path) -> Dict[str, Any]:
+        return {
+            'name': dt_file.stem,
+            'file': dt_file.name
+        }
+    
     def parse_appearance_files(self):
         """Parse appearance template files"""
         print("👁️  Parsing appearances...")
@@ -399,6 +2210,34 @@ class CompleteSWGParser:
         self.file_count += len(apt_files) + len(sat_files)
         print()
     
+    def resolve_lod_chains(self) -> Dict[str, Any]:
+        """Per-object LOD chains with vertex/triangle counts and switch distances"""
+        print("🔭 Resolving LOD chains...")
+        
+        object_path = self.swg_path / 'object'
+        if not object_path.exists():
+            print("   ⚠️  No object directory found\n")
+            return {}
+        
+        resolver = LodChainResolver(self.swg_path, self.tre_index)
+        objects = {}
+        for iff_file in sorted(object_path.rglob('*.iff')):
+            levels = resolver.resolve_template(iff_file.relative_to(self.swg_path).as_posix())
+            if levels:
+                objects[iff_file.relative_to(self.swg_path).as_posix()] = levels
+        
+        # Compact: meshes stored once; objects map to [mesh, near, far] per level, full detail first
+        self.results['lods'] = {
+            'meshes': [mesh[:4] for mesh in resolver.meshes],
+            'objects': objects
+        }
+        
+        chained = sum(1 for levels in objects.values() if len(levels) > 1)
+        print(f"   ✓ Objects: {len(objects)} ({chained} with multiple levels)")
+        print(f"   ✓ Meshes: {len(resolver.meshes)}\n")
+        
+        return self.results['lods']
+    
     def analyze_planet_data(self):
         """Analyze and organize planet-specific data"""
         print("🌍 Analyzing planet data...")
@@ -434,6 +2273,50 @@ class CompleteSWGParser:
         
         print(f"   ✓ Analyzed {len(planets)} planets\n")
     
+    def analyze_planet_placements(self) -> Dict[str, Any]:
+        """Density grids, template histograms, building counts and city clusters per planet"""
+        print("📈 Analyzing planet placements...")
+        
+        import importlib.util
+        
+        # PlanetAnalytics imports NumPy where it is used; only check that it is there
+        if importlib.util.find_spec('numpy') is None:
+            print("   ⚠️  NumPy not installed; skipping planet analytics (pip install numpy)\n")
+            return {}
+        
+        analytics = {}
+        for planet, info in self.results['planets'].items():
+            # Merge the planet's snapshots into one template table and node list
+            templates, template_ids, nodes = [], {}, []
+            for scene in info['snapshots']:
+                ws_file = self.swg_path / 'snapshot' / self.results['snapshots'][scene]['file']
+                try:
+                    with open_mapped(ws_file) as data:
+                        decoded = SnapshotReader(data).read()
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"   ❌ Failed to decode {ws_file.name}: {e}")
+                    continue
+                
+                remap = []
+                for name in decoded['templates']:
+                    if name not in template_ids:
+                        template_ids[name] = len(templates)
+                        templates.append(name)
+                    remap.append(template_ids[name])
+                nodes += [node[:2] + (remap[node[2]] if node[2] < len(remap) else node[2],) + node[3:]
+                          for node in decoded['nodes']]
+            if not nodes:
+                continue
+            
+            stats = PlanetAnalytics(templates, nodes).analyze(info['cities'])
+            analytics[planet] = stats
+            print(f"   ✓ {planet}: {stats['objects']} objects, {stats['buildings']} buildings, "
+                  f"{stats['cells']} cells, {len(stats['cities'])} cities")
+        
+        self.results['analytics'] = analytics
+        print()
+        return analytics
+    
     def get_planet_cities(self, planet: str) -> List[Dict]:
         """Get cities for planet (Core3 data)"""
         # Based on SWGEmu Core3 zone data
@@ -473,50 +2356,185 @@ class CompleteSWGParser:
         
         return spawns.get(planet, [])
     
+    def export_world_tiles(self, output_dir: str, tile_size: float = 1024.0) -> Dict[str, Any]:
+        """Write per-planet streaming tiles (placements, heights, template/texture IDs)"""
+        print("🧱 Exporting world tiles...")
+        
+        exporter = WorldTileExporter(self.swg_path, self.results, self.shaders, tile_size, self.tre_index)
+        summary = exporter.export(output_dir)
+        self.results['tiles'] = summary
+        
+        for planet, info in summary.items():
+            print(f"   ✓ {planet}: {info['tiles']} tiles, {info['placements']} placements, "
+                  f"{info['bytes'] / 1024:.0f} KB")
+        print(f"   ✓ Tiles written to {output_dir}/\n")
+        
+        return summary
+    
+    def deduplicate_assets(self, store_path: str) -> Dict[str, Any]:
+        """Content-hash the asset tree and store each duplicated file once"""
+        print("🧬 Deduplicating assets...")
+        
+        deduplicator = AssetDeduplicator(self.swg_path)
+        duplicates = deduplicator.find_duplicates()
+        
+        Path(store_path).mkdir(parents=True, exist_ok=True)
+        manifest = deduplicator.write_store(duplicates, store_path)
+        
+        self.results['dedup'] = {
+            'store': str(store_path),
+            'unique_blobs': len(manifest['blobs']),
+            'duplicate_files': len(manifest['files']),
+            'saved_bytes': manifest['saved_bytes']
+        }
+        
+        print(f"   ✓ Duplicate files: {len(manifest['files'])} -> {len(manifest['blobs'])} blobs")
+        print(f"   ✓ Saved: {manifest['saved_bytes'] / (1024 * 1024):.1f} MB\n")
+        
+        return manifest
+    
+    def build_delta_manifest(self, state_path: str, delta_path: str = None) -> Dict[str, Any]:
+        """Diff this run against the previous one and refresh asset version hashes"""
+        print("🔀 Building delta manifest...")
+        
+        delta = DeltaManifestBuilder(self.swg_path, state_path).build(self.spiller or self.results,
+                                                                      self.produced)
+        
+        if delta_path:
+            with open(delta_path, 'w', encoding='utf-8') as f:
+                json.dump(delta, f, indent=2, ensure_ascii=False)
+        
+        records, assets = delta['records'], delta['assets']
+        print(f"   ✓ Records: +{len(records['added'])} ~{len(records['changed'])} -{len(records['removed'])}")
+        print(f"   ✓ Assets: +{len(assets['added'])} ~{len(assets['changed'])} -{len(assets['removed'])}")
+        print(f"   ✓ CDN invalidations: {len(delta['invalidate'])}\n")
+        
+        return delta
+    
+    def export_sqlite_catalog(self, db_path: str) -> Dict[str, int]:
+        """Write the parse results to a queryable SQLite catalog"""
+        print("🗄️  Exporting SQLite catalog...")
+        
+        counts = SQLiteCatalogExporter(self.swg_path, self.results).export(db_path)
+        
+        for table, count in counts.items():
+            print(f"   ✓ {table}: {count}")
+        print()
+        
+        return counts
+    
     def detect_effect_type(self, name: str) -> str:
         """Detect effect type from name"""
-        if 'particle' in name: return 'particle'
-        if 'water' in name: return 'water'
-        if 'alpha' in name: return 'alpha'
-        if 'blend' in name: return 'blend'
-        if 'emis' in name: return 'emissive'
-        return 'standard'
+        
+        return NAME_CLASSIFIER.classify(name)['effectType']
 
 
 def main():
-    swg_path = r"C:\Users\david\OneDrive\Desktop\SWGTERRAIN"
+    arg_parser = argparse.ArgumentParser(description='Parse every SWG asset into JSON manifests')
+    arg_parser.add_argument('swg_path', nargs='?', default=os.environ.get('SWG_PATH'),
+                            help='SWGTERRAIN directory (default: $SWG_PATH)')
+    arg_parser.add_argument('--stages', default=','.join(CompleteSWGParser.STAGES),
+                            help='comma-separated stages to run; prerequisites are added '
+                                 f"automatically ({', '.join(CompleteSWGParser.STAGES)})")
+    arg_parser.add_argument('--list-stages', action='store_true',
+                            help='print the stages and their prerequisites, then exit')
+    arg_parser.add_argument('--max-memory', type=parse_size,
+                            help='budget for buffered results (e.g. 512M, 1G); finished '
+                                 'sections beyond it are spilled to temporary files')
+    arg_parser.add_argument('--tile-size', type=float, default=1024.0,
+                            help='world tile edge in metres for the tiles stage (default: 1024)')
+    arg_parser.add_argument('--hardened', action='store_true',
+                            help='parse each file in an isolated worker under --file-timeout and '
+                                 '--file-memory; failures are quarantined and skipped until changed')
+    arg_parser.add_argument('--file-timeout', type=float, default=30.0,
+                            help='seconds allowed per file (hardened mode)')
+    arg_parser.add_argument('--file-memory', type=parse_size, default=parse_size('2G'),
+                            help='address-space limit for the worker process (hardened mode)')
+    arg_parser.add_argument('--quarantine', default='swg_quarantine.json',
+                            help='quarantine list of files that failed (hardened mode)')
+    arg_parser.add_argument('--watch', action='store_true',
+                            help='stay resident and re-parse files as they change')
+    arg_parser.add_argument('--watch-output', default='swg_watch',
+                            help='directory for the per-section manifest shards (watch mode)')
+    arg_parser.add_argument('--interval', type=float, default=0.5,
+                            help='polling interval in seconds (watch mode)')
+    arg_parser.add_argument('--events-port', type=int,
+                            help='serve change events as SSE on http://127.0.0.1:PORT/events')
+    args = arg_parser.parse_args()
     
-    if len(sys.argv) > 1:
-        swg_path = sys.argv[1]
+    if args.list_stages:
+        for stage, (_method, prerequisites) in CompleteSWGParser.STAGES.items():
+            print(f"{stage:12} {', '.join(prerequisites) or '-'}")
+        return
     
-    # Parse everything
-    parser = CompleteSWGParser(swg_path)
-    results = parser.parse_everything()
+    if not args.swg_path:
+        arg_parser.error('no SWGTERRAIN path given (pass it as an argument or set SWG_PATH)')
+    
+    try:
+        requested = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+        stages = CompleteSWGParser.resolve_stages(requested)
+    except ValueError as e:
+        arg_parser.error(str(e))
     
-    # Generate comprehensive output
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     output_file = f'swg_complete_{timestamp}.json'
+    catalog_file = f'swg_catalog_{timestamp}.db'
+    delta_file = f'swg_delta_{timestamp}.json'
+    outputs = {
+        'tre': ('swg_tre_cache.json',),
+        'tiles': ('swg_tiles', args.tile_size),
+        # Content-addressed store is stable across runs
+        'dedup': ('asset_store',),
+        'catalog': (catalog_file,),
+        'delta': ('swg_versions.json', delta_file)
+    }
+    
+    # Parse the selected stages
+    if args.watch and args.max_memory:
+        arg_parser.error('--max-memory cannot be combined with --watch (watch mode keeps results resident)')
+    
+    parser = CompleteSWGParser(args.swg_path, args.max_memory)
+    if args.hardened:
+        parser.harden(args.file_timeout, args.file_memory, args.quarantine)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.watch:
+        parser.parse_everything([stage for stage in stages if stage in parser.PARSE_STAGES], outputs)
+        events = None
+        if args.events_port:
+            events = ChangeEventServer(args.events_port)
+            events.start()
+            print(f"📡 Change events: http://127.0.0.1:{args.events_port}/events")
+        AssetWatcher(parser, args.watch_output, args.interval, events).run()
+        return
+    
+    results = parser.parse_everything(stages, outputs)
     
     print("=" * 80)
     print("  PARSING COMPLETE")
     print("=" * 80)
+    objects = parser.section('objects')
     print(f"Total files processed: {results['metadata']['total_files']}")
-    print(f"\nPlanets: {len(results['planets'])}")
-    print(f"Terrain files: {len(results['terrain'])}")
-    print(f"Snapshots: {len(results['snapshots'])}")
-    print(f"Buildings: {len(results['objects']['buildings'])}")
-    print(f"Creatures: {len(results['objects']['creatures'])}")
-    print(f"Ships: {len(results['objects']['ships'])}")
-    print(f"Effects: {len(results['effects'])}")
-    print(f"Textures: {len(results['textures'])}")
-    print(f"Meshes: {len(results['meshes'])}")
+    print(f"\nPlanets: {len(parser.section('planets'))}")
+    print(f"Terrain files: {len(parser.section('terrain'))}")
+    print(f"Snapshots: {len(parser.section('snapshots'))}")
+    print(f"Buildings: {len(objects['buildings'])}")
+    print(f"Creatures: {len(objects['creatures'])}")
+    print(f"Ships: {len(objects['ships'])}")
+    print(f"Effects: {len(parser.section('effects'))}")
+    print(f"Textures: {len(parser.section('textures'))}")
+    print(f"Meshes: {len(parser.section('meshes'))}")
+    
+    # Generate comprehensive output (merges spilled segments)
+    parser.write_results(output_file)
     print("=" * 80)
     print(f"\n✓ Complete data saved to: {output_file}")
+    if 'catalog' in stages:
+        print(f"✓ Searchable catalog saved to: {catalog_file}")
+    if 'tiles' in stages:
+        print("✓ World tiles saved to: swg_tiles/")
+    if 'delta' in stages:
+        print(f"✓ Delta manifest saved to: {delta_file} (versions: swg_versions.json)")
     print("\nThis file contains ALL your SWG assets for rendering!")
 
-
 if __name__ == '__main__':
     main()
@@ -13,6 +13,10 @@ from pathlib import Path
 from typing import Dict, List, Any
 from datetime import datetime
 
+from swg_common import (ShaderParser, PaletteParser, CustomizationParser, DeltaManifestBuilder,
+                        NAME_CLASSIFIER)
+
+
 class SWGAssetParser:
     def __init__(self, swg_path: str):
         self.swg_path = Path(swg_path)
@@ -21,7 +25,8 @@ class SWGAssetParser:
             'flying_mounts': [],
             'effects': [],
             'professions': [],
-            'stats': {}
+            'stats': {},
+            'customization': {}
         }
         
     def parse_all(self):
@@ -32,6 +37,7 @@ class SWGAssetParser:
         print(f"Source: {self.swg_path}\n")
         
         self.parse_characters()
+        self.parse_customization()
         self.parse_flying_mounts()
         self.parse_effects()
         self.parse_professions()
@@ -48,20 +54,24 @@ class SWGAssetParser:
             print(f"   ⚠️  Character path not found: {char_path}")
             return
         
-        for iff_file in char_path.glob('*.iff'):
+        iff_files = list(char_path.glob('*.iff'))
+        traits = NAME_CLASSIFIER.classify_batch(f.stem.replace('shared_', '') for f in iff_files)
+        
+        for iff_file, char_traits in zip(iff_files, traits):
             try:
-                char = self.parse_character_iff(iff_file)
+                char = self.parse_character_iff(iff_file, char_traits)
                 self.results['characters'].append(char)
             except Exception as e:
                 print(f"   ❌ Failed to parse {iff_file.name}: {e}")
         
         print(f"   ✓ Parsed {len(self.results['characters'])} characters\n")
     
-    def parse_character_iff(self, file_path: Path) -> Dict[str, Any]:
+    def parse_character_iff(self, file_path: Path, traits: Dict[str, Any] = None) -> Dict[str, Any]:
         """Parse individual character file"""
         name = file_path.stem.replace('shared_', '')
-        species = self.detect_species(name)
-        gender = 'female' if 'female' in name else 'male'
+        traits = traits or NAME_CLASSIFIER.classify(name)
+        species = traits['species']
+        gender = traits['gender']
         
         return {
             'name': name,
@@ -71,6 +81,97 @@ class SWGAssetParser:
             'spawnLocations': self.get_species_spawn_locations(species)
         }
     
+    def parse_customization(self, palette_file: str = 'swg_palettes.bin'):
+        """Pack every palette into one RGBA blob and link customization variables to characters"""
+        print("🎨 Parsing palettes and customization...")
+        
+        # One RGBA uint8 array for all palettes; offsets/counts are in colors (4 bytes each)
+        names, offsets, counts, blob = [], [], [], bytearray()
+        for pal_file in sorted((self.swg_path / 'palette').rglob('*.pal')):
+            try:
+                rgba = PaletteParser.parse(pal_file.read_bytes())
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to parse {pal_file.name}: {e}")
+                continue
+            names.append(pal_file.relative_to(self.swg_path).as_posix().lower())
+            offsets.append(len(blob) // 4)
+            counts.append(len(rgba) // 4)
+            blob += rgba
+        
+        with open(palette_file, 'wb') as f:
+            f.write(blob)
+        
+        palette_ids = {name: i for i, name in enumerate(names)}
+        self.results['customization'] = {
+            'palettes': {
+                'file': palette_file,
+                'names': names,
+                'offsets': offsets,
+                'counts': counts
+            },
+            'variables': [],
+            'variableIds': [],
+            # [variable, palette (-1 if none or missing), min, max (exclusive), default]
+            'definitions': []
+        }
+        print(f"   ✓ Palettes: {len(names)} ({len(blob) // 4} colors, {len(blob)} bytes)")
+        
+        manager_path = self.swg_path / 'customization' / 'asset_customization_manager.iff'
+        if not manager_path.exists():
+            print("   ⚠️  No asset customization manager found\n")
+            return
+        
+        id_path = self.swg_path / 'customization' / 'customization_id_manager.iff'
+        try:
+            manager = CustomizationParser(manager_path.read_bytes(),
+                                          id_path.read_bytes() if id_path.exists() else None)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"   ❌ Failed to parse {manager_path.name}: {e}\n")
+            return
+        
+        table = self.results['customization']
+        variable_ids, definition_ids = {}, {}
+        for char in self.results['characters']:
+            char['appearance'] = None
+            char['customization'] = []
+            # Decode every usage first so a bad id leaves the shared tables untouched
+            try:
+                appearance = self.character_appearance(char['fileName'])
+                numbers = manager.asset_usages(appearance) if appearance else []
+                usages = {number: manager.usage(number) for number in numbers if number not in definition_ids}
+            except (OSError, ValueError, struct.error) as e:
+                print(f"   ❌ Failed to link {char['fileName']}: {e}")
+                continue
+            
+            char['appearance'] = appearance
+            for number in numbers:
+                if number not in definition_ids:
+                    usage = usages[number]
+                    if usage['variable'] not in variable_ids:
+                        variable_ids[usage['variable']] = len(table['variables'])
+                        table['variables'].append(usage['variable'])
+                        table['variableIds'].append(manager.variable_ids.get(usage['variable']))
+                    if 'palette' in usage:
+                        palette = palette_ids.get(usage['palette'], -1)
+                        low = 0
+                        high = counts[palette] if palette >= 0 else 0
+                    else:
+                        palette, low, high = -1, usage['min'], usage['max']
+                    definition_ids[number] = len(table['definitions'])
+                    table['definitions'].append(
+                        [variable_ids[usage['variable']], palette, low, high, usage['default']])
+                char['customization'].append(definition_ids[number])
+        
+        linked = sum(1 for char in self.results['characters'] if char['customization'])
+        print(f"   ✓ Variables: {len(table['variables'])}, definitions: {len(table['definitions'])}")
+        print(f"   ✓ Linked {linked}/{len(self.results['characters'])} characters\n")
+    
+    def character_appearance(self, file_name: str) -> str:
+        """appearanceFilename from a player character template"""
+        data = (self.swg_path / 'object' / 'creature' / 'player' / file_name).read_bytes()
+        match = re.search(rb'appearanceFilename\x00\x01([^\x00]+)\x00', data)
+        return match.group(1).decode('ascii', errors='ignore') if match else None
+    
     def parse_flying_mounts(self):
         """Parse ship files as flying mounts"""
         print("🚀 Parsing ships as flying mounts...")
@@ -80,50 +181,55 @@ class SWGAssetParser:
             print(f"   ⚠️  Ship path not found: {ship_path}")
             return
         
-        for iff_file in ship_path.glob('shared_*.iff'):
+        iff_files = list(ship_path.glob('shared_*.iff'))
+        traits = NAME_CLASSIFIER.classify_batch(
+            re.sub(r'_tier\d+', '', f.stem.replace('shared_', '')) for f in iff_files)
+        
+        for iff_file, mount_traits in zip(iff_files, traits):
             try:
-                mount = self.parse_mount_iff(iff_file)
+                mount = self.parse_mount_iff(iff_file, mount_traits)
                 self.results['flying_mounts'].append(mount)
             except Exception as e:
                 print(f"   ❌ Failed to parse {iff_file.name}: {e}")
         
         print(f"   ✓ Parsed {len(self.results['flying_mounts'])} flying mounts\n")
     
-    def parse_mount_iff(self, file_path: Path) -> Dict[str, Any]:
+    def parse_mount_iff(self, file_path: Path, traits: Dict[str, Any] = None) -> Dict[str, Any]:
         """Parse ship as flying mount"""
         name = file_path.stem.replace('shared_', '')
         tier = self.extract_tier(name)
         base_ship = re.sub(r'_tier\d+', '', name)
+        traits = traits or NAME_CLASSIFIER.classify(base_ship)
         
         return {
             'name': name,
             'displayName': self.format_display_name(base_ship, tier),
             'fileName': file_path.name,
             'type': 'flying_mount',
-            'category': self.detect_mount_category(base_ship),
+            'category': traits['mountCategory'],
             'tier': tier,
             'flightStats': {
-                'maxSpeed': self.calculate_mount_speed(base_ship, tier),
-                'acceleration': self.calculate_acceleration(base_ship),
-                'turnRate': self.calculate_turn_rate(base_ship),
-                'maxAltitude': self.calculate_max_altitude(base_ship),
-                'hoverHeight': self.calculate_hover_height(base_ship)
+                'maxSpeed': round(traits['baseSpeed'] * (1 + ((tier - 1) * 0.05))),
+                'acceleration': traits['acceleration'],
+                'turnRate': traits['turnRate'],
+                'maxAltitude': traits['maxAltitude'],
+                'hoverHeight': traits['hoverHeight']
             },
             'mountStats': {
                 'mountTime': 2.0,
                 'dismountTime': 1.5,
                 'canFlyInCombat': False,
-                'passengerSeats': self.get_passenger_count(base_ship)
+                'passengerSeats': traits['passengerSeats']
             },
             'appearance': {
-                'scale': self.calculate_mount_scale(base_ship),
+                'scale': traits['scale'],
                 'hasTrails': True,
                 'engineGlow': True
             },
             'availability': {
                 'requiresLicense': tier >= 3,
                 'minLevel': max(1, (tier - 1) * 10),
-                'cost': self.calculate_cost(base_ship, tier),
+                'cost': traits['baseCost'] * tier,
                 'planets': ['tatooine', 'naboo', 'corellia', 'dantooine', 'lok']
             }
         }
@@ -137,38 +243,40 @@ class SWGAssetParser:
             print(f"   ⚠️  Effect path not found: {effect_path}")
             return
         
-        for eft_file in effect_path.glob('*.eft'):
+        eft_files = list(effect_path.glob('*.eft'))
+        traits = NAME_CLASSIFIER.classify_batch(f.stem for f in eft_files)
+        
+        for eft_file, effect_traits in zip(eft_files, traits):
             try:
-                effect = self.parse_effect_file(eft_file)
+                effect = self.parse_effect_file(eft_file, effect_traits)
                 self.results['effects'].append(effect)
             except Exception as e:
                 print(f"   ❌ Failed to parse {eft_file.name}: {e}")
         
         print(f"   ✓ Parsed {len(self.results['effects'])} effects\n")
     
-    def parse_effect_file(self, file_path: Path) -> Dict[str, Any]:
+    def parse_effect_file(self, file_path: Path, traits: Dict[str, Any] = None) -> Dict[str, Any]:
         """Parse .eft shader file"""
         name = file_path.stem
+        traits = traits or NAME_CLASSIFIER.classify(name)
         
-        # Read file content
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except:
-            content = ""
+        # Binary IFF: texture slots come from PTXM tags, programs from PPSH
+        effect = ShaderParser.parse_effect(file_path.read_bytes())
         
         return {
             'name': name,
             'fileName': file_path.name,
             'type': 'effect',
-            'shaderType': self.detect_shader_type(name),
-            'textures': self.extract_texture_references(content),
+            'shaderType': traits['shaderType'],
+            'textures': effect['texture_tags'],
+            'pixelPrograms': effect['pixel_programs'],
+            'passes': effect['passes'],
             'properties': {
-                'hasAlpha': 'alpha' in name,
-                'hasBlend': 'blend' in name,
-                'hasEmissive': 'emis' in name,
-                'hasBump': 'bump' in name or 'cbmp' in name,
-                'hasSpecular': 'spec' in name
+                'hasAlpha': traits['hasAlpha'],
+                'hasBlend': traits['hasBlend'],
+                'hasEmissive': traits['hasEmissive'],
+                'hasBump': traits['hasBump'],
+                'hasSpecular': traits['hasSpecular']
             }
         }
     
@@ -263,17 +371,7 @@ class SWGAssetParser:
     
     def detect_species(self, name: str) -> str:
         """Detect species from character name"""
-        name_lower = name.lower()
-        if 'human' in name_lower: return 'human'
-        if 'wookiee' in name_lower: return 'wookiee'
-        if 'twilek' in name_lower: return 'twilek'
-        if 'zabrak' in name_lower: return 'zabrak'
-        if 'ithorian' in name_lower: return 'ithorian'
-        if 'sullustan' in name_lower: return 'sullustan'
-        if 'trandoshan' in name_lower: return 'trandoshan'
-        if 'bothan' in name_lower: return 'bothan'
-        if 'rodian' in name_lower: return 'rodian'
-        return 'unknown'
+        return NAME_CLASSIFIER.classify(name)['species']
     
     def get_species_spawn_locations(self, species: str) -> List[Dict[str, Any]]:
         """Get spawn locations for species"""
@@ -306,97 +404,40 @@ class SWGAssetParser:
     
     def detect_mount_category(self, ship_name: str) -> str:
         """Detect mount category"""
-        fighters = ['xwing', 'tiefighter', 'awing', 'ywing', 'z95']
-        speeders = ['flash_speeder', 'swoop']
-        transports = ['transport', 'shuttle']
-        
-        for fighter in fighters:
-            if fighter in ship_name:
-                return 'fighter'
-        for speeder in speeders:
-            if speeder in ship_name:
-                return 'speeder'
-        for transport in transports:
-            if transport in ship_name:
-                return 'transport'
-        return 'custom'
+        return NAME_CLASSIFIER.classify(ship_name)['mountCategory']
     
     def calculate_mount_speed(self, ship_name: str, tier: int) -> int:
         """Calculate mount speed"""
-        base_speeds = {
-            'xwing': 25, 'tiefighter': 28, 'awing': 30,
-            'ywing': 20, 'z95': 22, 'flash_speeder': 18,
-            'swoop': 26, 'transport': 15
-        }
-        
-        speed = 20  # default
-        for ship, base_speed in base_speeds.items():
-            if ship in ship_name:
-                speed = base_speed
-                break
-        
         tier_multiplier = 1 + ((tier - 1) * 0.05)
-        return round(speed * tier_multiplier)
+        return round(NAME_CLASSIFIER.classify(ship_name)['baseSpeed'] * tier_multiplier)
     
     def calculate_acceleration(self, ship_name: str) -> str:
         """Calculate acceleration"""
-        if 'awing' in ship_name or 'tiefighter' in ship_name:
-            return 'high'
-        elif 'ywing' in ship_name or 'transport' in ship_name:
-            return 'low'
-        return 'medium'
+        return NAME_CLASSIFIER.classify(ship_name)['acceleration']
     
     def calculate_turn_rate(self, ship_name: str) -> str:
         """Calculate turn rate"""
-        if 'tiefighter' in ship_name or 'awing' in ship_name:
-            return 'high'
-        elif 'ywing' in ship_name or 'z95' in ship_name:
-            return 'medium'
-        elif 'transport' in ship_name:
-            return 'low'
-        return 'medium'
+        return NAME_CLASSIFIER.classify(ship_name)['turnRate']
     
     def calculate_max_altitude(self, ship_name: str) -> int:
         """Calculate max altitude"""
-        if any(s in ship_name for s in ['xwing', 'tiefighter', 'awing', 'ywing']):
-            return 200
-        elif 'speeder' in ship_name or 'swoop' in ship_name:
-            return 50
-        return 100
+        return NAME_CLASSIFIER.classify(ship_name)['maxAltitude']
     
     def calculate_hover_height(self, ship_name: str) -> float:
         """Calculate hover height"""
-        return 1.5 if 'speeder' in ship_name else 3.0
+        return NAME_CLASSIFIER.classify(ship_name)['hoverHeight']
     
     def get_passenger_count(self, ship_name: str) -> int:
         """Get passenger seat count"""
-        if 'transport' in ship_name or 'shuttle' in ship_name:
-            return 4
-        return 0
+        return NAME_CLASSIFIER.classify(ship_name)['passengerSeats']
     
     def calculate_mount_scale(self, ship_name: str) -> float:
         """Calculate visual scale"""
-        scales = {
-            'tiefighter': 0.6, 'xwing': 0.7, 'awing': 0.7,
-            'ywing': 0.75, 'transport': 0.9, 'speeder': 0.5
-        }
-        for ship, scale in scales.items():
-            if ship in ship_name:
-                return scale
-        return 0.7
+        return NAME_CLASSIFIER.classify(ship_name)['scale']
     
     def calculate_cost(self, ship_name: str, tier: int) -> int:
         """Calculate cost"""
-        base_costs = {
-            'xwing': 15000, 'tiefighter': 12000, 'awing': 18000,
-            'ywing': 10000, 'transport': 25000
-        }
-        base_cost = 5000
-        for ship, cost in base_costs.items():
-            if ship in ship_name:
-                base_cost = cost
-                break
-        return base_cost * tier
+        return NAME_CLASSIFIER.classify(ship_name)['baseCost'] * tier
     
     def format_display_name(self, base_name: str, tier: int) -> str:
         """Format display name"""
@@ -405,25 +446,7 @@ class SWGAssetParser:
     
     def detect_shader_type(self, name: str) -> str:
         """Detect shader type"""
-        if 'particle' in name: return 'particle'
-        if 'water' in name: return 'water'
-        if 'terrain' in name: return 'terrain'
-        if 'blend' in name: return 'blend'
-        if 'alpha' in name: return 'alpha'
-        if 'emis' in name: return 'emissive'
-        return 'standard'
-    
-    def extract_texture_references(self, content: str) -> List[str]:
-        """Extract texture references from shader"""
-        textures = []
-        patterns = [
-            r'["\'](.*?\.(?:dds|tga))["\']',
-            r'texture\s*=\s*([^\s;]+)'
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            textures.extend(matches)
-        return list(set(textures))
+        return NAME_CLASSIFIER.classify(name)['shaderType']
 
 
 def main():
@@ -448,6 +471,12 @@ def main():
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     
+    # Delta against the previous run
+    delta_file = f'swg_assets_delta_{timestamp}.json'
+    delta = DeltaManifestBuilder(parser.swg_path, 'swg_assets_versions.json').build(results)
+    with open(delta_file, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, indent=2, ensure_ascii=False)
+    
     print("=" * 60)
     print("  Summary")
     print("=" * 60)
@@ -456,8 +485,12 @@ def main():
     print(f"Effects:        {len(results['effects'])}")
     print(f"Professions:    {len(results['professions'])}")
     print(f"Stats:          {len(results['stats']['attributes'])} attributes")
+    print(f"Palettes:       {len(results['customization'].get('palettes', {}).get('names', []))}")
+    print(f"Changed:        +{len(delta['records']['added'])} "
+          f"~{len(delta['records']['changed'])} -{len(delta['records']['removed'])} records")
     print("=" * 60)
     print(f"\n✓ Saved to: {output_file}")
+    print(f"✓ Delta saved to: {delta_file}")
     print("\nYou can now import this JSON into your web client!")
 
 
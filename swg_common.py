@@ -0,0 +1,681 @@
+"""
+Shared SWG readers for parse_everything.py and parse_swg_assets.py:
+IFF traversal, shader/effect, palette and customization decoding, asset
+name classification, content hashing and run-to-run delta manifests.
+"""
+
+import os
+import re
+import json
+import struct
+import hashlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Any, Iterable
+from datetime import datetime
+from collections import defaultdict
+
+
+class IFFParser:
+    """Parse IFF (Interchange File Format) files"""
+    
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+        
+    def read_chunk(self):
+        """Read an IFF chunk"""
+        if self.offset + 8 > len(self.data):
+            return None
+            
+        chunk_type = bytes(self.data[self.offset:self.offset+4]).decode('ascii', errors='ignore')
+        chunk_size = struct.unpack('>I', self.data[self.offset+4:self.offset+8])[0]
+        self.offset += 8
+        
+        remaining = len(self.data) - self.offset
+        if chunk_size > remaining:
+            raise ValueError(f"{chunk_type!r} chunk at {self.offset - 8} declares {chunk_size} bytes, "
+                             f"only {remaining} remain")
+        
+        chunk_data = self.data[self.offset:self.offset+chunk_size]
+        
+        # SWG IFF chunks are packed back to back (no even-boundary padding)
+        self.offset += chunk_size
+            
+        return {
+            'type': chunk_type,
+            'size': chunk_size,
+            'data': chunk_data
+        }
+    
+    def parse_all(self):
+        """Parse all chunks"""
+        chunks = []
+        while self.offset < len(self.data):
+            chunk = self.read_chunk()
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return chunks
+    
+    def walk(self, path: tuple = ()):
+        """Yield (form path, chunk type, data) for every leaf chunk, descending into FORMs"""
+        while True:
+            chunk = self.read_chunk()
+            if not chunk:
+                return
+            if chunk['type'] == 'FORM' and len(chunk['data']) >= 4:
+                form_type = bytes(chunk['data'][:4]).decode('ascii', errors='ignore')
+                yield from IFFParser(chunk['data'][4:]).walk(path + (form_type,))
+            else:
+                yield path, chunk['type'], chunk['data']
+
+
+def read_cstring(data: bytes, offset: int = 0) -> str:
+    """Read a NUL-terminated ASCII string"""
+    end = data.find(b'\x00', offset)
+    if end < 0:
+        end = len(data)
+    return data[offset:end].decode('ascii', errors='ignore')
+
+
+def read_tag(data: bytes, offset: int = 0) -> str:
+    """Decode a 4-character tag stored as a little-endian uint32 ('NIAM' -> 'MAIN')"""
+    return data[offset:offset + 4][::-1].decode('ascii', errors='ignore').strip()
+
+
+def normalize_asset_path(path: str) -> str:
+    """Canonical asset path: forward slashes, lowercase"""
+    return path.replace('\\', '/').lower()
+
+
+class ShaderParser:
+    """Parse effect (.eft), shader template (.sht) and pixel program (.psh) IFF data"""
+    
+    # MATL: ambient, diffuse, emissive, specular (RGBA each) + specular power
+    MATERIAL_FORMAT = '<17f'
+    
+    @staticmethod
+    def parse_effect(data: bytes) -> Dict[str, Any]:
+        """Implementations, passes, texture tags and shader programs of an effect"""
+        effect = {
+            'implementations': 0,
+            'passes': 0,
+            'texture_tags': [],
+            'pixel_programs': [],
+            'vertex_programs': []
+        }
+        
+        for path, chunk_type, chunk in IFFParser(data).walk():
+            form = path[-1] if path else ''
+            if len(path) >= 2 and path[-2] == 'IMPL' and chunk_type == 'SCAP':
+                effect['implementations'] += 1
+            elif form.isdigit() and len(path) >= 2 and path[-2] == 'PASS' and chunk_type == 'DATA':
+                effect['passes'] += 1
+            elif len(path) >= 2 and path[-2] == 'PPSH' and chunk_type == 'DATA' and len(chunk) > 1:
+                program = normalize_asset_path(read_cstring(chunk, 1))
+                if program not in effect['pixel_programs']:
+                    effect['pixel_programs'].append(program)
+            elif form == 'PVSH':
+                program = normalize_asset_path(read_cstring(chunk))
+                if program not in effect['vertex_programs']:
+                    effect['vertex_programs'].append(program)
+            elif form == 'PTXM' and len(chunk) >= 5:
+                tag = read_tag(chunk, 1)
+                if tag not in effect['texture_tags']:
+                    effect['texture_tags'].append(tag)
+        
+        return effect
+    
+    @classmethod
+    def parse_shader(cls, data: bytes) -> Dict[str, Any]:
+        """Effect reference, textures by tag and material parameters of a shader template"""
+        shader = {
+            'effect': None,
+            'textures': {},
+            'materials': {},
+            'texture_factors': {},
+            'customizable': data[8:12] == b'CSHD'
+        }
+        material_tag = None
+        
+        for path, chunk_type, chunk in IFFParser(data).walk():
+            form = path[-1] if path else ''
+            if chunk_type == 'NAME' and form.isdigit() and len(path) >= 2 and path[-2] == 'SSHT':
+                shader['effect'] = normalize_asset_path(read_cstring(chunk))
+            elif chunk_type == 'DATA' and len(path) >= 2 and path[-2] == 'TXM ':
+                material_tag = read_tag(chunk)
+            elif chunk_type == 'NAME' and len(path) >= 2 and path[-2] == 'TXM ':
+                shader['textures'][material_tag or 'MAIN'] = normalize_asset_path(read_cstring(chunk))
+            elif chunk_type == 'TAG ':
+                material_tag = read_tag(chunk)
+            elif chunk_type == 'MATL' and len(chunk) >= struct.calcsize(cls.MATERIAL_FORMAT):
+                values = struct.unpack_from(cls.MATERIAL_FORMAT, chunk)
+                shader['materials'][material_tag or 'MAIN'] = [round(v, 4) for v in values]
+            elif form == 'TFNS' and len(chunk) >= 8:
+                shader['texture_factors'][read_tag(chunk)] = struct.unpack_from('<I', chunk, 4)[0]
+        
+        return shader
+    
+    @staticmethod
+    def parse_pixel_program(data: bytes) -> Dict[str, Any]:
+        """Shader model and compiled size of a pixel program"""
+        program = {'model': None, 'bytecode_size': 0}
+        
+        for path, chunk_type, chunk in IFFParser(data).walk():
+            if chunk_type == 'PSRC':
+                first_line = chunk.split(b'\n', 1)[0].decode('ascii', errors='ignore').strip()
+                program['model'] = first_line.split()[-1] if first_line.startswith('//') else None
+            elif chunk_type == 'PEXE':
+                program['bytecode_size'] = len(chunk)
+        
+        return program
+
+
+def _crc_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+CRC_TABLE = _crc_table()
+
+
+def swg_crc(text: str) -> int:
+    """CRC the client uses to key asset paths (CRC-32, MSB-first, of the lowercased path)"""
+    crc = 0xFFFFFFFF
+    for byte in normalize_asset_path(text).encode('ascii', errors='ignore'):
+        crc = CRC_TABLE[((crc >> 24) ^ byte) & 0xFF] ^ ((crc << 8) & 0xFFFFFFFF)
+    return crc ^ 0xFFFFFFFF
+
+
+class PaletteParser:
+    """Decode RIFF 'PAL ' palettes (.pal) into RGBA bytes"""
+    
+    @staticmethod
+    def parse(data: bytes) -> bytes:
+        """RGBA uint8 quads; the fourth byte on disk is a flag, so alpha is always opaque"""
+        if data[:4] != b'RIFF' or data[8:12] != b'PAL ':
+            raise ValueError('not a RIFF PAL palette')
+        
+        chunk_size = struct.unpack_from('<I', data, 16)[0]
+        _version, count = struct.unpack_from('<HH', data, 20)
+        if 4 + count * 4 > chunk_size or 24 + count * 4 > len(data):
+            raise ValueError(f'palette declares {count} entries, data holds fewer')
+        
+        rgba = bytearray(data[24:24 + count * 4])
+        rgba[3::4] = b'\xff' * count
+        return bytes(rgba)
+
+
+class CustomizationParser:
+    """Decode the asset customization manager (ACST) and customization id manager (CIDM).
+    
+    ACST stores every table 1-based: an asset (found by path CRC in CIDX) lists
+    usages in ULST, each usage is a (variable, range type, default) triple in UCMP,
+    and range types with the high bit set name a palette instead of an int range.
+    LLST/LIDX link an asset to the assets (mesh parts) whose variables it inherits.
+    """
+    
+    PALETTE_RANGE = 0x8000
+    REQUIRED_CHUNKS = ('NAME', 'PNOF', 'VNOF', 'DEFV', 'IRNG', 'RTYP',
+                       'UCMP', 'ULST', 'LLST', 'UIDX', 'LIDX', 'CIDX')
+    
+    def __init__(self, manager_data: bytes, id_data: bytes = None):
+        chunks = {chunk_type: bytes(data) for _path, chunk_type, data in IFFParser(manager_data).walk()}
+        missing = [tag for tag in self.REQUIRED_CHUNKS if tag not in chunks]
+        if missing:
+            raise ValueError(f"customization manager lacks {', '.join(missing)}")
+        names = chunks['NAME']
+        
+        def string_at(offset):
+            return names[offset:names.index(b'\x00', offset)].decode('ascii', errors='ignore')
+        
+        def unpack(tag, code, size):
+            data = chunks[tag]
+            return struct.unpack(f'<{len(data) // size}{code}', data[:len(data) // size * size])
+        
+        self.palettes = [string_at(offset) for offset in unpack('PNOF', 'H', 2)]
+        self.variables = [string_at(offset) for offset in unpack('VNOF', 'H', 2)]
+        self.defaults = unpack('DEFV', 'i', 4)
+        self.int_ranges = unpack('IRNG', 'i', 4)
+        self.range_types = unpack('RTYP', 'H', 2)
+        ucmp = chunks['UCMP']
+        self.usages = [tuple(ucmp[i:i + 3]) for i in range(0, len(ucmp) - 2, 3)]
+        self.usage_list = unpack('ULST', 'H', 2)
+        self.link_list = unpack('LLST', 'H', 2)
+        self.usage_index = self.read_index(chunks['UIDX'])
+        self.link_index = self.read_index(chunks['LIDX'])
+        self.asset_ids = {crc: asset for crc, asset in struct.iter_unpack('<IH', chunks['CIDX'][:len(chunks['CIDX']) // 6 * 6])}
+        
+        self.variable_ids = {}
+        if id_data:
+            for _path, chunk_type, data in IFFParser(id_data).walk():
+                if chunk_type == 'DATA':
+                    offset = 0
+                    while offset + 2 < len(data):
+                        variable_id = struct.unpack_from('<H', data, offset)[0]
+                        name = read_cstring(data, offset + 2)
+                        self.variable_ids[name] = variable_id
+                        offset += 3 + len(name)
+    
+    @staticmethod
+    def read_index(data: bytes) -> Dict[int, tuple]:
+        """{asset id: (start, count)} from 5-byte (u16 asset, u16 start, u8 count) records"""
+        return {asset: (start, count)
+                for asset, start, count in struct.iter_unpack('<HHB', data[:len(data) // 5 * 5])}
+    
+    @staticmethod
+    def entry(table, number: int, name: str):
+        """table[number - 1] for a 1-based id; ValueError if the id is out of range"""
+        if not 1 <= number <= len(table):
+            raise ValueError(f'{name} id {number} out of range (1..{len(table)})')
+        return table[number - 1]
+    
+    def usage(self, number: int) -> Dict[str, Any]:
+        """One variable usage: name, palette or int range (max exclusive) and default"""
+        variable, range_type, default = self.entry(self.usages, number, 'usage')
+        kind = self.entry(self.range_types, range_type, 'range type')
+        usage = {'variable': self.entry(self.variables, variable, 'variable'),
+                 'default': self.entry(self.defaults, default, 'default')}
+        if kind & self.PALETTE_RANGE:
+            usage['palette'] = self.entry(self.palettes, kind & ~self.PALETTE_RANGE, 'palette')
+        else:
+            # Int ranges are stored as (min, max) pairs
+            usage['min'], usage['max'] = self.entry(
+                list(zip(self.int_ranges[::2], self.int_ranges[1::2])), kind, 'int range')
+        return usage
+    
+    def asset_usages(self, asset_path: str) -> List[int]:
+        """Usage numbers for an appearance and every asset linked beneath it"""
+        asset = self.asset_ids.get(swg_crc(asset_path))
+        if asset is None:
+            return []
+        
+        usages, variables, seen = [], set(), set()
+        pending = [asset]
+        while pending:
+            asset = pending.pop(0)
+            if asset in seen:
+                continue
+            seen.add(asset)
+            start, count = self.usage_index.get(asset, (0, 0))
+            for number in self.usage_list[start:start + count]:
+                # The first usage of a variable (closest to the root asset) wins
+                variable = self.entry(self.usages, number, 'usage')[0]
+                if variable not in variables:
+                    variables.add(variable)
+                    usages.append(number)
+            start, count = self.link_index.get(asset, (0, 0))
+            for linked in self.link_list[start:start + count]:
+                if not linked:
+                    raise ValueError('linked asset id 0 out of range')
+                pending.append(linked)
+        return usages
+
+
+class AssetDeduplicator:
+    """Find byte-identical asset files and build a content-addressed store for them"""
+    
+    HEAD_SIZE = 64 * 1024
+    
+    def __init__(self, root: Path, workers: int = None):
+        self.root = Path(root)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        
+    def find_duplicates(self) -> Dict[str, List[str]]:
+        """Return {content_hash: [relative paths]} for every group of identical files"""
+        by_size = defaultdict(list)
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                size = os.path.getsize(path)
+                if size:
+                    by_size[size].append(path)
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Only files sharing a size can be identical; a cheap head hash
+        # prunes large same-size files before reading them in full
+        candidates = [paths for paths in by_size.values() if len(paths) > 1]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            groups = self.regroup(pool, candidates, self.hash_head)
+            groups = self.regroup(pool, groups, self.hash_file, keyed=True)
+        
+        return {
+            digest: sorted(Path(p).relative_to(self.root).as_posix() for p in paths)
+            for digest, paths in groups.items()
+        }
+    
+    def regroup(self, pool: 'ThreadPoolExecutor', groups, hasher, keyed: bool = False):
+        """Split each group by hash, keeping only sub-groups with more than one file"""
+        groups = list(groups)
+        paths = [p for group in groups for p in group]
+        digests = dict(zip(paths, pool.map(hasher, paths)))
+        
+        result = {} if keyed else []
+        for group in groups:
+            split = defaultdict(list)
+            for path in group:
+                split[digests[path]].append(path)
+            for digest, members in split.items():
+                if len(members) < 2:
+                    continue
+                if keyed:
+                    result[digest] = members
+                else:
+                    result.append(members)
+        return result
+    
+    def hash_head(self, path: str) -> tuple:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(self.HEAD_SIZE)
+        return size, hashlib.blake2b(head, digest_size=16).hexdigest()
+    
+    def hash_file(self, path: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def write_store(self, duplicates: Dict[str, List[str]], store_path: Path) -> Dict[str, Any]:
+        """Copy one blob per duplicate group into the store and write the path->hash map"""
+        import shutil
+        
+        store_path = Path(store_path)
+        files, blobs = {}, {}
+        
+        for digest, paths in duplicates.items():
+            extension = Path(paths[0]).suffix.lower()
+            blob_name = f'{digest[:2]}/{digest}{extension}'
+            blob_path = store_path / blob_name
+            
+            # Content-addressed: an existing blob is already correct
+            if not blob_path.exists():
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self.root / paths[0], blob_path)
+            
+            size = os.path.getsize(blob_path)
+            blobs[digest] = {'blob': blob_name, 'size': size, 'refs': len(paths)}
+            for path in paths:
+                files[path] = digest
+        
+        manifest = {
+            'root': str(self.root),
+            'files': files,
+            'blobs': blobs,
+            'saved_bytes': sum(b['size'] * (b['refs'] - 1) for b in blobs.values())
+        }
+        with open(store_path / 'dedup_map.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        
+        return manifest
+
+
+class DeltaManifestBuilder:
+    """Diff a parse run against the previous one and assign per-asset version hashes"""
+    
+    # Sections that change on every run without the data changing
+    VOLATILE_SECTIONS = ('metadata',)
+    RECORD_ID_FIELDS = ('path', 'shader', 'fileName', 'file', 'name')
+    
+    def __init__(self, root: Path, state_path: str, workers: int = None):
+        self.root = Path(root)
+        self.state_path = Path(state_path)
+        self.hasher = AssetDeduplicator(self.root, workers)
+        
+    def load_state(self) -> Dict[str, Any]:
+        """Version state written by the previous run (empty on the first run)"""
+        if not self.state_path.exists():
+            return {'records': {}, 'assets': {}, 'stat': {}}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def build(self, results, sections=None) -> Dict[str, Any]:
+        """Compare results (a dict, or anything with .items()) and the asset tree with the last run.
+        
+        When `sections` is given only those sections are diffed; records of every other
+        section are carried over from the previous state unchanged."""
+        previous = self.load_state()
+        
+        records = self.record_hashes(results, sections)
+        if sections is not None:
+            records.update((key, digest) for key, digest in previous['records'].items()
+                           if key.split('/', 1)[0] not in sections)
+        assets, stat = self.asset_hashes(previous)
+        
+        record_delta = self.diff(previous['records'], records)
+        asset_delta = self.diff(previous['assets'], assets)
+        
+        state = {
+            'generated_at': datetime.now().isoformat(),
+            'records': records,
+            'assets': assets,
+            'stat': stat
+        }
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        
+        return {
+            'previous': previous.get('generated_at'),
+            'current': state['generated_at'],
+            'records': record_delta,
+            'assets': {
+                'added': {path: assets[path] for path in asset_delta['added']},
+                'changed': {path: assets[path] for path in asset_delta['changed']},
+                'removed': asset_delta['removed']
+            },
+            # CDN objects whose cached copies are now stale
+            'invalidate': sorted(asset_delta['changed'] + asset_delta['removed'])
+        }
+    
+    def record_hashes(self, results, sections=None) -> Dict[str, str]:
+        """{stable record key: content hash} for every record in the results"""
+        hashes = {}
+        for section, value in results.items():
+            if section in self.VOLATILE_SECTIONS or (sections is not None and section not in sections):
+                continue
+            
+            # Hash section by section so spilled sections are never all in RAM
+            records = {}
+            self.collect(section, value, records)
+            for key, record in records.items():
+                hashes[key] = hashlib.blake2b(
+                    json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+                    digest_size=8).hexdigest()
+        
+        return hashes
+    
+    def collect(self, prefix: str, value: Any, records: Dict[str, Any]):
+        """Flatten nested sections down to individually keyed records"""
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                key = f'{prefix}/{self.record_id(item, index)}'
+                if key in records:
+                    key = f'{key}#{index}'
+                records[key] = item
+        elif isinstance(value, dict) and value and all(
+                isinstance(v, (dict, list)) for v in value.values()):
+            for name, item in value.items():
+                if isinstance(item, list):
+                    self.collect(f'{prefix}/{name}', item, records)
+                else:
+                    records[f'{prefix}/{name}'] = item
+        else:
+            records[prefix] = value
+    
+    def record_id(self, item: Any, index: int) -> str:
+        if isinstance(item, dict):
+            for field in self.RECORD_ID_FIELDS:
+                if item.get(field):
+                    return str(item[field])
+        elif isinstance(item, str):
+            return item
+        return str(index)
+    
+    def asset_hashes(self, previous: Dict[str, Any]) -> tuple:
+        """Content hash of every asset file, re-hashing only files whose size/mtime changed"""
+        stat, assets, stale = {}, {}, []
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                key = Path(path).relative_to(self.root).as_posix()
+                info = os.stat(path)
+                stat[key] = [info.st_size, info.st_mtime_ns]
+                
+                if previous['stat'].get(key) == stat[key] and key in previous['assets']:
+                    assets[key] = previous['assets'][key]
+                else:
+                    stale.append((key, path))
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.hasher.workers) as pool:
+            for (key, _path), digest in zip(stale, pool.map(self.hasher.hash_file, (p for _, p in stale))):
+                assets[key] = digest[:12]
+        
+        return dict(sorted(assets.items())), stat
+    
+    @staticmethod
+    def diff(before: Dict[str, str], after: Dict[str, str]) -> Dict[str, List[str]]:
+        return {
+            'added': sorted(key for key in after if key not in before),
+            'changed': sorted(key for key in after if key in before and before[key] != after[key]),
+            'removed': sorted(key for key in before if key not in after)
+        }
+
+
+# Declarative name-classification rules.
+# attribute -> (default, [(keyword or keywords, value), ...]); the first rule
+# with any keyword present in the (lowercased) name wins.
+NAME_RULES = {
+    'species': ('unknown', [
+        ('human', 'human'), ('wookiee', 'wookiee'), ('twilek', 'twilek'),
+        ('zabrak', 'zabrak'), ('ithorian', 'ithorian'), ('sullustan', 'sullustan'),
+        ('trandoshan', 'trandoshan'), ('bothan', 'bothan'), ('rodian', 'rodian')
+    ]),
+    'gender': ('male', [('female', 'female')]),
+    'mountCategory': ('custom', [
+        (('xwing', 'tiefighter', 'awing', 'ywing', 'z95'), 'fighter'),
+        (('flash_speeder', 'swoop'), 'speeder'),
+        (('transport', 'shuttle'), 'transport')
+    ]),
+    'baseSpeed': (20, [
+        ('xwing', 25), ('tiefighter', 28), ('awing', 30), ('ywing', 20), ('z95', 22),
+        ('flash_speeder', 18), ('swoop', 26), ('transport', 15)
+    ]),
+    'acceleration': ('medium', [
+        (('awing', 'tiefighter'), 'high'), (('ywing', 'transport'), 'low')
+    ]),
+    'turnRate': ('medium', [
+        (('tiefighter', 'awing'), 'high'), (('ywing', 'z95'), 'medium'), ('transport', 'low')
+    ]),
+    'maxAltitude': (100, [
+        (('xwing', 'tiefighter', 'awing', 'ywing'), 200), (('speeder', 'swoop'), 50)
+    ]),
+    'hoverHeight': (3.0, [('speeder', 1.5)]),
+    'passengerSeats': (0, [(('transport', 'shuttle'), 4)]),
+    'scale': (0.7, [
+        ('tiefighter', 0.6), ('xwing', 0.7), ('awing', 0.7), ('ywing', 0.75),
+        ('transport', 0.9), ('speeder', 0.5)
+    ]),
+    'baseCost': (5000, [
+        ('xwing', 15000), ('tiefighter', 12000), ('awing', 18000), ('ywing', 10000),
+        ('transport', 25000)
+    ]),
+    'shaderType': ('standard', [
+        ('particle', 'particle'), ('water', 'water'), ('terrain', 'terrain'),
+        ('blend', 'blend'), ('alpha', 'alpha'), ('emis', 'emissive')
+    ]),
+    'effectType': ('standard', [
+        ('particle', 'particle'), ('water', 'water'), ('alpha', 'alpha'),
+        ('blend', 'blend'), ('emis', 'emissive')
+    ]),
+    'hasAlpha': (False, [('alpha', True)]),
+    'hasBlend': (False, [('blend', True)]),
+    'hasEmissive': (False, [('emis', True)]),
+    'hasBump': (False, [(('bump', 'cbmp'), True)]),
+    'hasSpecular': (False, [('spec', True)])
+}
+
+
+class NameClassifier:
+    """Single-pass classifier compiled from a declarative rule table.
+    
+    Every keyword (plus the ``tier<N>`` marker) is folded into one
+    alternation wrapped in a lookahead, so one ``finditer`` over a batch of
+    names reports every keyword at every position. Rules are then resolved
+    with set lookups instead of repeated substring scans.
+    """
+    
+    def __init__(self, rules: Dict[str, tuple]):
+        self.rules = []
+        keywords = set()
+        for attribute, (default, entries) in rules.items():
+            compiled = []
+            for match, value in entries:
+                match = (match,) if isinstance(match, str) else tuple(match)
+                keywords.update(match)
+                compiled.append((match, value))
+            self.rules.append((attribute, default, compiled))
+        
+        # At one position the alternation only reports its longest keyword,
+        # so a hit also implies every keyword that is a prefix of it.
+        self.implies = {
+            kw: {other for other in keywords if kw.startswith(other)} for kw in keywords
+        }
+        alternation = '|'.join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+        self.pattern = re.compile(rf'(?=(tier(\d+)|{alternation}))')
+        self.cache = {}
+    
+    def classify(self, name: str) -> Dict[str, Any]:
+        """Classify a single name"""
+        return self.classify_batch([name])[0]
+    
+    def classify_batch(self, names: Iterable[str]) -> List[Dict[str, Any]]:
+        """Classify many names with a single regex scan"""
+        names = [name.lower() for name in names]
+        starts, offset = [], 0
+        for name in names:
+            starts.append(offset)
+            offset += len(name) + 1
+        
+        found = [set() for _ in names]
+        tiers = [1] * len(names)
+        tier_seen = [False] * len(names)
+        for match in self.pattern.finditer('\n'.join(names)):
+            index = bisect_right(starts, match.start()) - 1
+            if match.group(2) is not None:
+                if not tier_seen[index]:
+                    tiers[index] = int(match.group(2))
+                    tier_seen[index] = True
+            else:
+                found[index].update(self.implies[match.group(1)])
+        
+        # Most names share a handful of keyword combinations
+        results = []
+        for keywords, tier in zip(found, tiers):
+            key = (frozenset(keywords), tier)
+            if key not in self.cache:
+                self.cache[key] = self.resolve(key[0], tier)
+            results.append(dict(self.cache[key]))
+        return results
+    
+    def resolve(self, keywords: frozenset, tier: int) -> Dict[str, Any]:
+        """Apply the rule table to the keywords present in one name"""
+        result = {'tier': tier}
+        for attribute, default, entries in self.rules:
+            result[attribute] = default
+            for match, value in entries:
+                if any(kw in keywords for kw in match):
+                    result[attribute] = value
+                    break
+        return result
+
+
+NAME_CLASSIFIER = NameClassifier(NAME_RULES)
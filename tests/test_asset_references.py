@@ -0,0 +1,33 @@
+"""Regression checks for asset reference extraction in parse_everything"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parse_everything import ASSET_REFERENCE_PATTERN  # noqa: E402
+
+
+def references(data: bytes):
+    return [match.group(1).decode('ascii') for match in ASSET_REFERENCE_PATTERN.finditer(data)]
+
+
+def test_tag_and_length_prefixes_are_not_part_of_the_path():
+    data = (b'NIAMpalette/hair.pal\x00'
+            b'HUEBpalette/skin.pal\x00'
+            b'\x09object/tangible/item.iff\x00'
+            b'0vertex_program/skin.vsh\x00'
+            b'9NIAMtexture/body.dds\x00'
+            b'-texture/eye.dds\x00')
+    assert references(data) == [
+        'palette/hair.pal', 'palette/skin.pal', 'object/tangible/item.iff',
+        'vertex_program/skin.vsh', 'texture/body.dds', 'texture/eye.dds'
+    ]
+
+
+def test_paths_outside_the_asset_tree_are_ignored():
+    assert references(b'a_exported/scratch/body.dds\x00') == []
+
+
+def test_relative_appearance_children_are_kept():
+    assert references(b'\x00\x00\x00\x00mesh/ship_l0.msh\x00') == ['mesh/ship_l0.msh']
@@ -0,0 +1,38 @@
+"""Regression checks for .stf string table decoding in parse_everything"""
+
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parse_everything import STFParser  # noqa: E402
+
+
+def string_table(entries):
+    data = struct.pack('<IBII', STFParser.MAGIC, 1, len(entries) + 1, len(entries))
+    for index, (_key, text) in enumerate(entries, 1):
+        data += struct.pack('<III', index, 0, len(text)) + text.encode('utf-16-le')
+    for index, (key, _text) in enumerate(entries, 1):
+        data += struct.pack('<II', index, len(key)) + key.encode('ascii')
+    return data
+
+
+def test_parse_round_trip():
+    data = string_table([('name', 'Tatooine'), ('desc', 'A desert world')])
+    assert STFParser(data).parse() == {'name': 'Tatooine', 'desc': 'A desert world'}
+
+
+def test_truncated_table_raises_value_error():
+    data = string_table([('name', 'Tatooine'), ('desc', 'A desert world')])
+    with pytest.raises(ValueError):
+        STFParser(data[:40]).parse()
+
+
+def test_count_larger_than_data_raises_value_error():
+    data = bytearray(string_table([('name', 'Tatooine')]))
+    struct.pack_into('<I', data, 9, 1000)
+    with pytest.raises(ValueError):
+        STFParser(bytes(data)).parse()